@@ -3,18 +3,52 @@
 This file loads the environment variables from the .env file,
 then loads the cogs used for the command modules for the WindiaFAQ
 Discord Bot, then runs the WindiaFAQ Bot using the Token stored in 
-the .env file.
+the .env file. Before logging in, it prints how long each import and
+loading each cog took so that slow startups can be traced to their cause.
 """
 
+import time
+
+startup_times = []
+
+
+def timed(label: str, start: float):
+    startup_times.append((label, time.perf_counter() - start))
+
+
+start = time.perf_counter()
+
 import os.path
 import sys
 import traceback
 
 import discord.errors
 from discord.ext import commands
+timed('import discord', start)
 
+start = time.perf_counter()
 from botcore import Bot
+timed('import botcore', start)
+
+start = time.perf_counter()
+import windiautils
 from windiautils import Config
+timed('import windiautils', start)
+
+
+def print_startup_report():
+    total = sum(seconds for label, seconds in startup_times)
+    print()
+    print('Startup time')
+    print('----------------------------------')
+    for label, seconds in startup_times:
+        print(f'{label:<40}{seconds * 1000:>10.1f} ms')
+    # windiautils submodules are imported lazily, so these are included in the times above
+    for module, seconds in sorted(windiautils.import_times.items()):
+        print(f'{"  first use of " + module:<40}{seconds * 1000:>10.1f} ms')
+    print(f'{"total":<40}{total * 1000:>10.1f} ms')
+    print('----------------------------------')
+
 
 config = Config.getInstance()
 prefix = config.get('Bot', 'Prefix')
@@ -31,7 +65,10 @@ if os.path.exists(cogs_path):
 
     for cog in cogs:
         try:
+            # load_extension executes the module itself, so this is the cog's import and setup time together
+            start = time.perf_counter()
             bot.load_extension(cog)
+            timed(f'load {cog}', start)
             print(f'{cog} loaded.')
         except commands.ExtensionAlreadyLoaded:
             print(f'{cog} is already loaded.')
@@ -44,6 +81,8 @@ if os.path.exists(cogs_path):
             traceback.print_exc()
             continue
 
+print_startup_report()
+
 try:
     bot.run(token, reconnect=True)
 except discord.errors.LoginFailure:
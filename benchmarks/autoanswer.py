@@ -0,0 +1,139 @@
+"""Measures what the passive auto-answer listener costs per chat message
+
+Times KeywordIndex.match over a mix of ordinary chat and plain-text questions,
+on the FAQs of commands.json and padded up to 1k and 10k synthetic FAQs whose
+descriptions reuse the real vocabulary, then times the whole FAQ.auto_answer
+listener on a copy of windia.db. Reports us/message (mean, p50, p99), how many
+messages ran over the budget and how many would have been answered.
+
+Usage: python -m benchmarks.autoanswer [-n MESSAGES] [--budget MICROSECONDS]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import botcore  # noqa: E402
+import windiautils  # noqa: E402
+from benchmarks.fuzzy import synthetic_names  # noqa: E402
+from benchmarks.stubs import StubGuild, StubMessage, StubUser  # noqa: E402
+from cogs.faq import AUTO_ANSWER_THRESHOLD  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMANDS_FILE = os.path.join(ROOT, 'commands.json')
+DATABASE_FILE = os.path.join(ROOT, 'windia.db')
+SCALES = (1000, 10000)
+
+CHAT = (
+    'lol that boss was insane', 'anyone want to party at zakum', 'good morning everyone', 'gg', 'brb dinner',
+    'i love this game so much', 'who is online tonight', 'nice drop!', 'can someone carry me through ludi pq',
+    'that was the worst horntail run ever, we wiped twice and then the server lagged out on the last head',
+)
+QUESTIONS = (
+    'how do i patch', 'error 0x04', 'i get a missing dll error', 'how do i donate', 'what are the rates',
+    'game crashes when training', 'where do i download the game', 'how do i get a sylph ring',
+)
+
+
+def synthetic_documents(count: int, rng: random.Random) -> dict:
+    """Returns commands.json padded to `count` FAQs, the extra ones written with its own words"""
+
+    with open(COMMANDS_FILE, encoding='utf-8') as file:
+        documents = json.load(file)
+    vocabulary = windiautils.keywords(' '.join(documents.values()))
+
+    for name in synthetic_names(count, rng):
+        if name not in documents:
+            documents[name] = ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(10, 60)))
+    return documents
+
+
+def summarize(samples: list, budget_ns: int, answered: int) -> str:
+    samples = sorted(samples)
+    mean = sum(samples) / len(samples) / 1e3
+    p50 = samples[len(samples) // 2] / 1e3
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1e3
+    over = sum(sample > budget_ns for sample in samples)
+    return f'{mean:>10.1f}{p50:>10.1f}{p99:>10.1f}{over:>8}{answered / len(samples):>10.1%}'
+
+
+def bench_index(messages: list, budget_ns: int, rng: random.Random):
+    for scale in (0, ) + SCALES:
+        documents = synthetic_documents(scale, rng)
+        start = time.perf_counter()
+        index = windiautils.KeywordIndex({command: ([command], text) for command, text in documents.items()})
+        build = time.perf_counter() - start
+
+        samples, answered = list(), 0
+        for message in messages:
+            start = time.perf_counter_ns()
+            match = index.match(message, AUTO_ANSWER_THRESHOLD, budget_ns)
+            samples.append(time.perf_counter_ns() - start)
+            answered += match is not None
+
+        label = f'match, {index.size} FAQs'
+        print(f'{label:<28}{summarize(samples, budget_ns, answered)}   built in {build * 1e3:.1f} ms')
+
+
+async def bench_listener(messages: list, budget_ns: int):
+    bot = botcore.Bot('$')
+    bot.load_extension('cogs.faq')
+    faq = bot.get_cog('FAQ')
+    bot.config.set('AutoAnswer', 'Enabled', 1)
+    bot.config.set('AutoAnswer', 'BudgetMicroseconds', budget_ns // 1000)
+    # a cooldown of 0 makes every message scanned, which is the worst case
+    bot.config.set('AutoAnswer', 'Cooldown', 0)
+    await faq.get_keyword_index()
+
+    guild = StubGuild()
+    # members are only answered where they may use FAQ commands
+    channel = guild.add_channel('bot-commands', channel_id=bot.config.getint('Bot', 'Channel'))
+    member = StubUser('member', guild=guild)
+
+    samples, answered = list(), 0
+    for message in messages:
+        before = bot.metrics.counters('auto_answers_total').get((('outcome', 'answered'), ), 0)
+        start = time.perf_counter_ns()
+        await faq.auto_answer(StubMessage(message, channel=channel, author=member))
+        samples.append(time.perf_counter_ns() - start)
+        answered += bot.metrics.counters('auto_answers_total').get((('outcome', 'answered'), ), 0) > before
+
+    print(f'{"auto_answer listener":<28}{summarize(samples, budget_ns, answered)}   includes queueing the reply')
+    await bot.config.flush()
+    bot.outbox.shutdown()
+
+
+async def main(count: int, budget_us: int):
+    rng = random.Random(0)
+    messages = [rng.choice(QUESTIONS if rng.random() < 0.2 else CHAT) for _ in range(count)]
+    budget_ns = budget_us * 1000
+
+    print(f'{count} messages, 20% questions, budget {budget_us} us')
+    print(f'{"":<28}{"mean us":>10}{"p50 us":>10}{"p99 us":>10}{"over":>8}{"answered":>10}')
+    bench_index(messages, budget_ns, rng)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copy(DATABASE_FILE, directory)
+        os.chdir(directory)
+        try:
+            await bench_listener(messages, budget_ns)
+        finally:
+            await windiautils.Database.getInstance().close()
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--messages', type=int, default=5000)
+    parser.add_argument('--budget', type=int, default=250, help='the per-message budget in microseconds')
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.messages, arguments.budget))
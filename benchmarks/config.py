@@ -0,0 +1,78 @@
+"""Checks that Config.set coalesces bursts into few, atomic writes of windia.ini
+
+Runs 1,000 sets in quick succession on the event loop while a thread rereads
+the file as fast as it can. Every read must parse and hold every section (no
+partially written file is ever visible), and the number of writes must stay
+within the number of FLUSH_DELAY windows the burst spans, plus the final flush.
+
+Usage: python -m benchmarks.config [-n SETS]
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import configobj
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from windiautils import config as configmodule  # noqa: E402
+
+SECTIONS = ('Bot', 'Logging', 'Compute')
+
+
+def read_continuously(filename: str, stop: threading.Event, results: dict):
+    while not stop.is_set():
+        with open(filename, 'rb') as file:
+            data = file.read()
+        parsed = configobj.ConfigObj(data.splitlines())
+        results['reads'] += 1
+        if any(section not in parsed for section in SECTIONS):
+            results['partial'] += 1
+
+
+async def burst(config, count: int):
+    for i in range(count):
+        config.set('Bot', 'Channel', i)
+        if i % 50 == 0:
+            # let scheduled flushes and other tasks run, as they would between messages
+            await asyncio.sleep(0.01)
+    await config.flush()
+
+
+def main(count: int):
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        config = configmodule.Config.getInstance()
+
+        stop = threading.Event()
+        results = {'reads': 0, 'partial': 0}
+        reader = threading.Thread(target=read_continuously, args=(config._config.filename, stop, results))
+        reader.start()
+
+        start = time.perf_counter()
+        asyncio.run(burst(config, count))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        reader.join()
+
+        written = configobj.ConfigObj(config._config.filename)
+        bound = math.ceil(elapsed / configmodule.FLUSH_DELAY) + 1
+
+    print(f'{count} sets in {elapsed * 1000:.1f} ms: {config.writes} writes (bound {bound}), '
+          f'{results["reads"]} concurrent reads, {results["partial"]} partial')
+    assert int(written['Bot']['Channel']) == count - 1, 'the last set was not written'
+    assert config.writes <= bound, 'sets were not coalesced'
+    assert results['partial'] == 0, 'a partially written file was visible'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--sets', type=int, default=1000)
+    main(parser.parse_args().sets)
@@ -0,0 +1,120 @@
+"""Compares ops/sec of the faqprocessor CRUD functions before and after the shared connection
+
+The `legacy_*` functions below are the per-call `aiosqlite.connect` versions the
+faqprocessor used to have; they are kept here only so the two can be compared.
+
+Usage: python -m benchmarks.crud [-n ITERATIONS]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import aiosqlite
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import windiautils  # noqa: E402
+
+DATABASE_FILE = 'windia.db'
+
+
+async def legacy_create_command(command: str, value: str):
+    async with aiosqlite.connect(DATABASE_FILE) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute(" SELECT * FROM commands WHERE command = ?; ", (command, )) as cursor:
+            if await cursor.fetchone():
+                return False
+            await db.execute(" INSERT INTO commands (command, description) VALUES (?, ?); ", (command, value, ))
+            await db.commit()
+            return True
+
+
+async def legacy_get_command(command: str):
+    async with aiosqlite.connect(DATABASE_FILE) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute(" SELECT * FROM commands WHERE command = ?; ", (command, )) as cursor:
+            if row := await cursor.fetchone():
+                return row['description']
+            return None
+
+
+async def legacy_update_command(command: str, value: str):
+    async with aiosqlite.connect(DATABASE_FILE) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute(" SELECT * FROM commands WHERE command = ?; ", (command, )) as cursor:
+            if await cursor.fetchone():
+                await db.execute(" UPDATE commands SET description = ? WHERE command = ?; ", (value, command, ))
+                await db.commit()
+                return True
+            return False
+
+
+async def legacy_delete_command(command: str):
+    async with aiosqlite.connect(DATABASE_FILE) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute(" SELECT * FROM commands WHERE command = ?; ", (command, )) as cursor:
+            if await cursor.fetchone():
+                await db.execute(" DELETE FROM commands WHERE command = ?; ", (command, ))
+                await db.commit()
+                return True
+            return False
+
+
+async def legacy_iter_commands():
+    async with aiosqlite.connect(DATABASE_FILE) as db:
+        db.row_factory = aiosqlite.Row
+        async with db.execute(" SELECT * FROM commands; ") as cursor:
+            async for row in cursor:
+                yield row['command']
+
+
+async def drain(iterator):
+    async for _ in iterator:
+        pass
+
+
+async def measure(name: str, iterations: int, func):
+    start = time.perf_counter()
+    for i in range(iterations):
+        await func(i)
+    elapsed = time.perf_counter() - start
+    return name, iterations / elapsed
+
+
+async def run_suite(iterations: int, create, get, update, delete, iterate):
+    return [
+        await measure('create', iterations, lambda i: create(f'bench{i}', 'description')),
+        await measure('get', iterations, lambda i: get(f'bench{i}')),
+        await measure('update', iterations, lambda i: update(f'bench{i}', 'new description')),
+        await measure('iter', max(1, iterations // 10), lambda i: drain(iterate())),
+        await measure('delete', iterations, lambda i: delete(f'bench{i}')),
+    ]
+
+
+async def main(iterations: int):
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+
+        await windiautils.create_database()
+        await windiautils.Database.getInstance().close()
+        before = await run_suite(iterations, legacy_create_command, legacy_get_command, legacy_update_command,
+                                 legacy_delete_command, legacy_iter_commands)
+
+        await windiautils.load_commands(reload=True)
+        after = await run_suite(iterations, windiautils.create_command, windiautils.get_command,
+                                windiautils.update_command, windiautils.delete_command, windiautils.iter_commands)
+        await windiautils.Database.getInstance().close()
+
+    print(f'{"function":<10}{"before ops/s":>16}{"after ops/s":>16}{"speedup":>10}')
+    for (name, old), (_, new) in zip(before, after):
+        print(f'{name:<10}{old:>16.1f}{new:>16.1f}{new / old:>9.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--iterations', type=int, default=200)
+    asyncio.run(main(parser.parse_args().iterations))
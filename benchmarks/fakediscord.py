@@ -0,0 +1,348 @@
+"""A local stand-in for the Discord gateway and REST API
+
+Implements just enough of both for the real Bot and its cogs to log in, see one
+guild and answer messages: the gateway handshake (HELLO, IDENTIFY, READY,
+GUILD_CREATE, heartbeats) and MESSAGE_CREATE dispatches, plus the REST routes
+the cogs call to send messages, react, open DMs and delete messages. Message
+sends and reactions are rate limited per channel and answered with 429s the way
+Discord does. Everything the bot sends is reported to `on_reply`.
+
+Run the bot against a server with:
+    python -m benchmarks.fakediscord --api http://127.0.0.1:PORT
+from a directory holding windia.ini, windia.db and a cogs link; see
+benchmarks.loadtest, which does all of this.
+"""
+
+import argparse
+import asyncio
+import collections
+import datetime
+import itertools
+import json
+import os
+import runpy
+import sys
+import time
+from typing import (
+    Callable,
+    Dict,
+    Optional
+)
+
+from aiohttp import web
+
+API_PREFIX = '/api/v7'
+HEARTBEAT_INTERVAL = 41250  # milliseconds, as Discord sends it
+
+# the permissions of @everyone and of the moderator role
+EVERYONE_PERMISSIONS = 0x00000400 | 0x00000800 | 0x00004000 | 0x00008000 | 0x00010000 | 0x00000040
+MODERATOR_PERMISSIONS = EVERYONE_PERMISSIONS | 0x00002000
+
+
+def timestamp() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+def json_response(data, *, status: int = 200, headers: dict = None) -> web.Response:
+    # discord.py only decodes bodies whose content type is exactly application/json, without a charset
+    headers = dict(headers or (), **{'Content-Type': 'application/json'})
+    return web.Response(body=json.dumps(data).encode(), status=status, headers=headers)
+
+
+class FakeDiscord:
+    """An aiohttp application serving the gateway and REST routes for a single guild
+
+    Members
+    -------
+    rate_limit: int
+        The number of sends (or reactions) a channel accepts per rate_period
+
+    rate_period: float
+        The length of a channel's rate limit window in seconds
+
+    advertise_limits: bool
+        Whether successful responses carry rate limit headers; without them
+        discord.py cannot wait ahead of time and runs into 429s instead
+
+    on_reply: Callable[[str, int, dict], None]
+        Called with ('message' or 'reaction', channel ID, payload) for everything the bot sends
+
+    ready: asyncio.Event
+        Set once the bot has identified and set its presence, which it does in on_ready
+
+    counters: collections.Counter
+        REST requests, 429 responses and gateway dispatches
+    """
+
+    def __init__(self, *, bot_channel_id: int, log_channel_id: int, rate_limit: int = 5,
+                 rate_period: float = 5.0, advertise_limits: bool = True,
+                 on_reply: Optional[Callable[[str, int, dict], None]] = None):
+        self.rate_limit = rate_limit
+        self.rate_period = rate_period
+        self.advertise_limits = advertise_limits
+        self.on_reply = on_reply or (lambda kind, channel_id, payload: None)
+        self.ready = asyncio.Event()
+        self.counters = collections.Counter()
+
+        self._ids = itertools.count(900000000000000000)
+        self._sequence = itertools.count(1)
+        self._buckets: Dict[tuple, list] = dict()
+        self._sockets = set()
+        self._runner = None
+        self.url = None
+
+        self.guild_id = self.next_id()
+        self.owner = self.user('owner')
+        self.bot_user = self.user('WindiaFAQ', bot=True)
+        self.moderator_role_id = self.next_id()
+        self.users = {int(self.owner['id']): self.owner, int(self.bot_user['id']): self.bot_user}
+        self.channels = {
+            bot_channel_id: self.text_channel(bot_channel_id, 'bot-commands', 0),
+            log_channel_id: self.text_channel(log_channel_id, 'bot-logs', 1),
+        }
+        self.dm_channels = dict()
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get('/gateway', self.gateway),
+            web.get(f'{API_PREFIX}/gateway', self.get_gateway),
+            web.get(f'{API_PREFIX}/gateway/bot', self.get_gateway),
+            web.get(f'{API_PREFIX}/users/@me', self.get_me),
+            web.get(f'{API_PREFIX}/oauth2/applications/@me', self.get_application),
+            web.post(f'{API_PREFIX}/users/@me/channels', self.create_dm),
+            web.post(f'{API_PREFIX}/channels/{{channel_id}}/messages', self.create_message),
+            web.delete(f'{API_PREFIX}/channels/{{channel_id}}/messages/{{message_id}}', self.no_content),
+            web.put(f'{API_PREFIX}/channels/{{channel_id}}/messages/{{message_id}}/reactions/{{emoji}}/@me',
+                    self.add_reaction),
+        ])
+
+    def next_id(self) -> int:
+        return next(self._ids)
+
+    def user(self, name: str, *, bot: bool = False) -> dict:
+        return {'id': str(self.next_id()), 'username': name, 'discriminator': '0001', 'avatar': None, 'bot': bot}
+
+    def text_channel(self, channel_id: int, name: str, position: int) -> dict:
+        return {
+            'id': str(channel_id), 'type': 0, 'guild_id': str(self.guild_id), 'name': name, 'position': position,
+            'permission_overwrites': [], 'topic': None, 'nsfw': False, 'last_message_id': None,
+            'rate_limit_per_user': 0, 'parent_id': None
+        }
+
+    def member(self, user: dict, *, moderator: bool = False) -> dict:
+        return {
+            'user': user, 'roles': [str(self.moderator_role_id)] if moderator else [], 'joined_at': timestamp(),
+            'deaf': False, 'mute': False, 'nick': None
+        }
+
+    def guild(self) -> dict:
+        def role(role_id: int, name: str, permissions: int, position: int) -> dict:
+            return {
+                'id': str(role_id), 'name': name, 'color': 0, 'hoist': False, 'position': position,
+                'permissions': str(permissions), 'managed': False, 'mentionable': False
+            }
+
+        return {
+            'id': str(self.guild_id), 'name': 'Windia', 'icon': None, 'splash': None, 'discovery_splash': None,
+            'owner_id': self.owner['id'], 'region': 'us-east', 'afk_channel_id': None, 'afk_timeout': 300,
+            'verification_level': 0, 'default_message_notifications': 0, 'explicit_content_filter': 0,
+            'roles': [
+                role(self.guild_id, '@everyone', EVERYONE_PERMISSIONS, 0),
+                role(self.moderator_role_id, 'Moderator', MODERATOR_PERMISSIONS, 1),
+            ],
+            'emojis': [], 'features': [], 'mfa_level': 0, 'system_channel_id': None, 'large': False,
+            'unavailable': False, 'member_count': 2, 'voice_states': [], 'presences': [],
+            'members': [self.member(self.owner, moderator=True), self.member(self.bot_user)],
+            'channels': list(self.channels.values()), 'premium_tier': 0, 'premium_subscription_count': 0,
+            'preferred_locale': 'en-US', 'joined_at': timestamp()
+        }
+
+    def message(self, channel_id: int, author: dict, *, content: str = '', embeds: list = (),
+                moderator: bool = False) -> dict:
+        message = {
+            'id': str(self.next_id()), 'channel_id': str(channel_id), 'author': author, 'content': content,
+            'timestamp': timestamp(), 'edited_timestamp': None, 'tts': False, 'mention_everyone': False,
+            'mentions': [], 'mention_roles': [], 'attachments': [], 'embeds': list(embeds), 'pinned': False,
+            'type': 0, 'flags': 0
+        }
+        if channel_id in self.channels:
+            message['guild_id'] = str(self.guild_id)
+            message['member'] = {key: value for key, value in self.member(author, moderator=moderator).items()
+                                 if key != 'user'}
+        return message
+
+    # gateway
+
+    async def gateway(self, request: web.Request) -> web.WebSocketResponse:
+        socket = web.WebSocketResponse()
+        await socket.prepare(request)
+        self._sockets.add(socket)
+        try:
+            await socket.send_json({'op': 10, 'd': {'heartbeat_interval': HEARTBEAT_INTERVAL}})
+            async for frame in socket:
+                payload = json.loads(frame.data)
+                op = payload['op']
+                if op == 1:
+                    await socket.send_json({'op': 11})
+                elif op == 2:
+                    await self.dispatch('READY', {
+                        'v': 6, 'user': self.bot_user, 'private_channels': [], 'relationships': [],
+                        'guilds': [{'id': str(self.guild_id), 'unavailable': True}], 'session_id': 'fake',
+                        'application': {'id': self.bot_user['id'], 'flags': 0}
+                    }, socket)
+                    await self.dispatch('GUILD_CREATE', self.guild(), socket)
+                elif op == 3:
+                    self.ready.set()
+                elif op == 6:
+                    await self.dispatch('RESUMED', {}, socket)
+        finally:
+            self._sockets.discard(socket)
+        return socket
+
+    async def dispatch(self, event: str, data: dict, socket: web.WebSocketResponse = None):
+        self.counters[f'dispatch {event}'] += 1
+        payload = {'op': 0, 't': event, 's': next(self._sequence), 'd': data}
+        for target in ([socket] if socket else list(self._sockets)):
+            await target.send_json(payload)
+
+    async def send_message(self, channel_id: int, author: dict, content: str, *, moderator: bool = False) -> dict:
+        """Posts a message as a user and dispatches MESSAGE_CREATE for it"""
+
+        self.users[int(author['id'])] = author
+        message = self.message(channel_id, author, content=content, moderator=moderator)
+        await self.dispatch('MESSAGE_CREATE', message)
+        return message
+
+    # REST
+
+    def rate_limited(self, bucket: tuple) -> Optional[web.Response]:
+        """Counts a request against its bucket, returning the 429 response if the bucket is exhausted"""
+
+        now = time.monotonic()
+        window = self._buckets.get(bucket)
+        if window is None or now >= window[0]:
+            window = self._buckets[bucket] = [now + self.rate_period, 0]
+
+        reset_after = window[0] - now
+        headers = {
+            'X-RateLimit-Limit': str(self.rate_limit),
+            'X-RateLimit-Reset': f'{time.time() + reset_after:.3f}',
+            'X-RateLimit-Reset-After': f'{reset_after:.3f}',
+            'X-RateLimit-Bucket': '/'.join(map(str, bucket)),
+        }
+
+        if window[1] >= self.rate_limit:
+            self.counters['429'] += 1
+            headers['X-RateLimit-Remaining'] = '0'
+            headers['Retry-After'] = f'{reset_after:.3f}'
+            # discord.py treats a 429 that did not come through Discord's proxy as a Cloudflare ban
+            headers['Via'] = '1.1 google'
+            body = {'message': 'You are being rate limited.', 'retry_after': reset_after * 1000, 'global': False}
+            return json_response(body, status=429, headers=headers)
+
+        window[1] += 1
+        headers['X-RateLimit-Remaining'] = str(self.rate_limit - window[1])
+        return headers if self.advertise_limits else dict()
+
+    async def get_gateway(self, request: web.Request) -> web.Response:
+        self.counters['rest'] += 1
+        url = self.url.replace('http', 'ws', 1) + '/gateway'
+        return json_response({
+            'url': url, 'shards': 1,
+            'session_start_limit': {'total': 1000, 'remaining': 1000, 'reset_after': 0, 'max_concurrency': 1}
+        })
+
+    async def get_me(self, request: web.Request) -> web.Response:
+        self.counters['rest'] += 1
+        return json_response(self.bot_user)
+
+    async def get_application(self, request: web.Request) -> web.Response:
+        self.counters['rest'] += 1
+        return json_response({
+            'id': self.bot_user['id'], 'name': 'WindiaFAQ', 'icon': None, 'description': '', 'rpc_origins': None,
+            'bot_public': False, 'bot_require_code_grant': False, 'owner': self.owner, 'summary': '',
+            'verify_key': '', 'team': None, 'flags': 0
+        })
+
+    async def create_dm(self, request: web.Request) -> web.Response:
+        self.counters['rest'] += 1
+        recipient_id = int((await request.json())['recipient_id'])
+        if recipient_id not in self.dm_channels:
+            channel_id = self.next_id()
+            self.dm_channels[recipient_id] = {
+                'id': str(channel_id), 'type': 1, 'last_message_id': None, 'recipients': [self.users[recipient_id]]
+            }
+        return json_response(self.dm_channels[recipient_id])
+
+    async def create_message(self, request: web.Request) -> web.Response:
+        self.counters['rest'] += 1
+        channel_id = int(request.match_info['channel_id'])
+        headers = self.rate_limited(('messages', channel_id))
+        if isinstance(headers, web.Response):
+            return headers
+
+        if request.content_type.startswith('multipart/'):
+            # uploads carry the message as a payload_json field next to the files
+            form = await request.post()
+            body = json.loads(form.get('payload_json') or '{}')
+            body['attachments'] = [
+                {'id': str(self.next_id()), 'filename': field.filename, 'size': len(field.file.read()),
+                 'url': f'{self.url}/attachments/{field.filename}', 'proxy_url': ''}
+                for field in form.values() if isinstance(field, web.FileField)
+            ]
+        else:
+            body = await request.json()
+        embeds = [body['embed']] if body.get('embed') else body.get('embeds', [])
+        message = self.message(channel_id, self.bot_user, content=body.get('content') or '', embeds=embeds)
+        message['attachments'] = body.get('attachments', [])
+        self.counters['messages'] += 1
+        self.on_reply('message', channel_id, message)
+        return json_response(message, headers=headers)
+
+    async def add_reaction(self, request: web.Request) -> web.Response:
+        self.counters['rest'] += 1
+        channel_id = int(request.match_info['channel_id'])
+        headers = self.rate_limited(('reactions', channel_id))
+        if isinstance(headers, web.Response):
+            return headers
+
+        self.counters['reactions'] += 1
+        self.on_reply('reaction', channel_id, dict(request.match_info))
+        return web.Response(status=204, headers=headers)
+
+    async def no_content(self, request: web.Request) -> web.Response:
+        self.counters['rest'] += 1
+        return web.Response(status=204)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """Starts serving and returns the base URL, picking a free port when port is 0"""
+
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f'http://{host}:{port}'
+        return self.url
+
+    async def stop(self):
+        for socket in list(self._sockets):
+            await socket.close()
+        await self._runner.cleanup()
+
+
+def run_bot(api: str):
+    """Runs the bot's own entry point with discord.py pointed at a FakeDiscord server"""
+
+    import discord.http
+    discord.http.Route.BASE = f'{api}{API_PREFIX}'
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, root)
+    runpy.run_path(os.path.join(root, '__main__.py'), run_name='__main__')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--api', required=True, help='the base URL of a running FakeDiscord server')
+    run_bot(parser.parse_args().api)
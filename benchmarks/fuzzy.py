@@ -0,0 +1,74 @@
+"""Measures "Did you mean" latency of the trigram index against the old difflib full scan
+
+Builds an index of synthetic FAQ names around the real ones in commands.json and
+times suggestions for a batch of typo'd queries.
+
+Usage: python -m benchmarks.fuzzy [-n NAMES] [-q QUERIES]
+"""
+
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from windiautils.fuzzy import TrigramIndex, is_similar  # noqa: E402
+
+COMMANDS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'commands.json')
+
+
+def synthetic_names(count: int, rng: random.Random):
+    with open(COMMANDS_FILE, encoding='utf-8') as file:
+        names = set(json.load(file))
+
+    while len(names) < count:
+        length = rng.randint(3, 14)
+        names.add(''.join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(length)))
+
+    return list(names)
+
+
+def typo(word: str, rng: random.Random):
+    position = rng.randrange(len(word))
+    return word[:position] + rng.choice(string.ascii_lowercase) + word[position + 1:]
+
+
+def full_scan(names, query):
+    return [name for name in names if is_similar(query, name)]
+
+
+def time_per_query(func, queries):
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main(count: int, query_count: int):
+    rng = random.Random(0)
+    names = synthetic_names(count, rng)
+    queries = [typo(rng.choice(names), rng) for _ in range(query_count)]
+    queries = [query for query in queries if len(query) > 2]
+
+    start = time.perf_counter()
+    index = TrigramIndex(names)
+    build = time.perf_counter() - start
+
+    scan = time_per_query(lambda query: full_scan(names, query), queries)
+    indexed = time_per_query(lambda query: index.search(query), queries)
+
+    print(f'{len(names)} names, {len(queries)} queries, index built in {build * 1e3:.1f} ms')
+    print(f'difflib full scan: {scan:>10.1f} us/query')
+    print(f'trigram index:     {indexed:>10.1f} us/query ({scan / indexed:.1f}x)')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--names', type=int, default=10000)
+    parser.add_argument('-q', '--queries', type=int, default=200)
+    arguments = parser.parse_args()
+    main(arguments.names, arguments.queries)
@@ -0,0 +1,236 @@
+"""Measures the bot's hot paths offline and writes a comparable JSON report
+
+Runs the real Bot with all cogs loaded against stub guilds, channels, members
+and messages, on a copy of windia.db topped up with the entries of
+commands.json. Nearest match suggestions are also measured after padding the
+FAQ up to 1k and 10k synthetic names, followed by a bulk import rewriting all
+of them. Every result reports ops/sec, p50 and p99. Image detection in
+compile_embed is checked against IMAGE_CASES before anything is timed.
+
+Usage: python -m benchmarks.hotpaths [-n ITERATIONS] [-o REPORT] [-b BASELINE]
+"""
+
+import argparse
+import asyncio
+import datetime
+import inspect
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import botcore  # noqa: E402
+import windiautils  # noqa: E402
+from benchmarks.fuzzy import synthetic_names, typo  # noqa: E402
+from benchmarks.stubs import StubContext, StubGuild, StubMessage, StubUser  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMMANDS_FILE = os.path.join(ROOT, 'commands.json')
+DATABASE_FILE = os.path.join(ROOT, 'windia.db')
+COGS = ('cogs.admin', 'cogs.errors', 'cogs.faq', 'cogs.help', 'cogs.utility')
+SCALES = (1000, 10000)
+IMPORT_ITERATIONS = 5
+# descriptions and the image compile_embed must find in them
+IMAGE_CASES = (
+    ('https://i.imgur.com/a.png', 'https://i.imgur.com/a.png'),
+    ('Patch first: https://i.imgur.com/a.JPG.', 'https://i.imgur.com/a.JPG'),
+    ('(see https://i.imgur.com/a.gif)', 'https://i.imgur.com/a.gif'),
+    ('<https://i.imgur.com/a.jpeg>', 'https://i.imgur.com/a.jpeg'),
+    ('Like this https://cdn.discordapp.com/attachments/1/2/a.png?width=400&height=300 one',
+     'https://cdn.discordapp.com/attachments/1/2/a.png?width=400&height=300'),
+    ('https://media.discordapp.net/a.png?ex=1&is=2.', 'https://media.discordapp.net/a.png?ex=1&is=2'),
+    ('https://i.imgur.com/a.pngx', None),
+    ('No image here', None),
+)
+
+
+async def measure(iterations: int, func) -> dict:
+    """Calls func(i) `iterations` times, after a short warm up, and summarizes the per-call times"""
+
+    for i in range(max(1, iterations // 10)):
+        if inspect.isawaitable(result := func(i)):
+            await result
+
+    samples = list()
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        if inspect.isawaitable(result := func(i)):
+            await result
+        samples.append(time.perf_counter_ns() - start)
+
+    samples.sort()
+    return {
+        'iterations': iterations,
+        'ops_per_sec': iterations / (sum(samples) / 1e9),
+        'p50_us': samples[len(samples) // 2] / 1e3,
+        'p99_us': samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1e3,
+    }
+
+
+async def seed_commands():
+    """Adds every commands.json entry that windia.db does not have yet"""
+
+    with open(COMMANDS_FILE, encoding='utf-8') as file:
+        entries = windiautils.read_entries(file)
+    await windiautils.load_commands(reload=True)
+    await windiautils.import_commands(
+        {command: description for command, description in entries.items() if not windiautils.resolve_command(command)}
+    )
+
+
+async def pad_commands(count: int, rng: random.Random):
+    """Inserts synthetic FAQ commands until there are `count` names"""
+
+    existing = set(windiautils.command_names())
+    names = [name for name in synthetic_names(count, rng) if name not in existing][:count - len(existing)]
+
+    db = await windiautils.Database.getInstance().connect()
+    await db.executemany(
+        " INSERT OR IGNORE INTO commands (command, description) VALUES (?, ?); ",
+        ((name, f'Synthetic FAQ entry {name}.') for name in names)
+    )
+    await db.commit()
+    await windiautils.load_commands(reload=True)
+
+
+def check_images():
+    for description, image in IMAGE_CASES:
+        if (found := windiautils.compile_embed(title='image', description=description).image) != image:
+            raise AssertionError(f'compile_embed found {found!r} in {description!r}, expected {image!r}')
+
+
+async def run(iterations: int) -> dict:
+    check_images()
+    rng = random.Random(0)
+    results = dict()
+
+    bot = botcore.Bot('$')
+    for cog in COGS:
+        bot.load_extension(cog)
+    faq = bot.get_cog('FAQ')
+    help_cog = bot.get_cog('Help')
+
+    await seed_commands()
+    names = windiautils.command_names()
+    misses = [typo(rng.choice(names), rng) + 'x' for _ in range(iterations * 2)]
+
+    guild = StubGuild()
+    bot_channel = guild.add_channel('bot-commands', channel_id=bot.config.getint('Bot', 'Channel'))
+    member = StubUser('member', guild=guild)
+    moderator = StubUser('moderator', moderator=True, guild=guild)
+
+    def trigger(command: str, author: StubUser = member) -> StubMessage:
+        return StubMessage(f'${command}', channel=bot_channel, author=author)
+
+    # every reply is a fresh answer unless coalescing is what is being measured
+    bot.config.set('Bot', 'CoalesceWindow', 0)
+    results['faq_check.hit'] = await measure(
+        iterations, lambda i: faq.faq_check(trigger(names[i % len(names)]), names[i % len(names)])
+    )
+    results['faq_check.miss'] = await measure(
+        iterations, lambda i: faq.faq_check(trigger(misses[i]), misses[i])
+    )
+    bot.config.set('Bot', 'CoalesceWindow', 30)
+    results['faq_check.coalesced'] = await measure(iterations, lambda i: faq.faq_check(trigger(names[0]), names[0]))
+
+    results['get_command.hit'] = await measure(iterations, lambda i: windiautils.get_command(names[i % len(names)]))
+    results['get_command.miss'] = await measure(iterations, lambda i: windiautils.get_command(misses[-i - 1]))
+    results['get_command.miss_repeat'] = await measure(iterations, lambda i: windiautils.get_command(misses[0]))
+    results['search_commands'] = await measure(iterations, lambda i: windiautils.search_commands('missing dll'))
+
+    template = windiautils.compile_embed(title=names[0], description=await windiautils.get_command(names[0]))
+    results['embed.compile'] = await measure(
+        iterations, lambda i: windiautils.compile_embed(title=names[0], description=template.description)
+    )
+    results['embed.render'] = await measure(iterations, lambda i: windiautils.render_template(template, member))
+    results['send_embed'] = await measure(
+        iterations,
+        lambda i: windiautils.send_embed(names[0], template.description, messageable=bot_channel, author=member)
+    )
+
+    windiautils.calc_magic.cache_clear()
+    results['calc_magic.cold'] = await measure(iterations, lambda i: windiautils.calc_magic(100 + i, 1.0 + i % 7 / 10))
+    results['calc_magic.cached'] = await measure(iterations, lambda i: windiautils.calc_magic(100, 1.0))
+
+    results['help.render'] = await measure(
+        iterations, lambda i: (help_cog.pages.clear(), help_cog.get_pages(moderator=True))
+    )
+    results['help.cached'] = await measure(iterations, lambda i: help_cog.get_pages(moderator=True))
+    results['help_command'] = await measure(
+        iterations, lambda i: help_cog.help_command.callback(help_cog, StubContext(bot, trigger('help', moderator)))
+    )
+
+    for scale in (len(names), ) + SCALES:
+        if scale > len(windiautils.command_names()):
+            await pad_commands(scale, rng)
+        queries = [typo(rng.choice(names), rng) for _ in range(iterations)]
+        results[f'get_nearest_match.{scale}'] = await measure(
+            iterations, lambda i: windiautils.get_nearest_match(queries[i])
+        )
+
+    # every description changes on every pass, so each import updates the whole FAQ and reloads the cache
+    entries = await windiautils.export_commands()
+    results[f'import_commands.{len(entries)}'] = await measure(
+        IMPORT_ITERATIONS,
+        lambda i: windiautils.import_commands(
+            {command: f'{i} {description}' for command, description in entries.items()}
+        )
+    )
+
+    await bot.config.flush()
+    bot.outbox.shutdown()
+    return results
+
+
+def print_report(report: dict, baseline: dict = None):
+    previous = baseline['results'] if baseline else dict()
+    print(f'{"benchmark":<28}{"ops/s":>14}{"p50 us":>12}{"p99 us":>12}' + (f'{"vs base":>10}' if baseline else ''))
+    for name, result in report['results'].items():
+        line = f'{name:<28}{result["ops_per_sec"]:>14.1f}{result["p50_us"]:>12.1f}{result["p99_us"]:>12.1f}'
+        if name in previous:
+            line += f'{result["ops_per_sec"] / previous[name]["ops_per_sec"]:>9.2f}x'
+        print(line)
+
+
+async def main(iterations: int, output: str, baseline: str):
+    output = output and os.path.abspath(output)
+    baseline = baseline and json.load(open(baseline, encoding='utf-8'))
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copy(DATABASE_FILE, directory)
+        os.chdir(directory)
+        try:
+            results = await run(iterations)
+        finally:
+            await windiautils.Database.getInstance().close()
+            os.chdir(cwd)
+
+    report = {
+        'created': datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'iterations': iterations,
+        'results': results,
+    }
+
+    print_report(report, baseline)
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f'report written to {output}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--iterations', type=int, default=1000)
+    parser.add_argument('-o', '--output', help='where to write the JSON report')
+    parser.add_argument('-b', '--baseline', help='an earlier JSON report to compare ops/sec against')
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.iterations, arguments.output, arguments.baseline))
@@ -0,0 +1,244 @@
+"""Replays a message mix against the real bot on a local fake Discord and reports reply latency
+
+Starts a FakeDiscord server, runs the bot's own entry point against it in a
+child process (with every cog, on a copy of windia.db), then posts messages
+into the bot channel at a target rate. Every message comes from a new user, so
+each reply (an embed authored for them, a mention, a DM or a reaction) can be
+matched to the message that caused it. Reports throughput and p50/p90/p99
+reply latency per message kind, plus how often the fake API answered 429.
+
+Usage: python -m benchmarks.loadtest [-r RATE] [-d DURATION] [-m MIX] [--rate-limit N] [-o REPORT]
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import re
+import shutil
+import signal
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import configobj  # noqa: E402
+
+from benchmarks.fakediscord import FakeDiscord  # noqa: E402
+from benchmarks.fuzzy import typo  # noqa: E402
+from windiautils.config import CONFIG_FILE, DEFAULT_CONFIG  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_FILE = os.path.join(ROOT, 'windia.db')
+DEFAULT_MIX = 'faq=70,typo=20,magic=5,help=5'
+USER_NAME = re.compile(r'load(\d+)#')
+MENTION = re.compile(r'<@!?(\d+)>')
+
+
+def parse_mix(mix: str) -> dict:
+    weights = dict()
+    for part in mix.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in ('faq', 'typo', 'magic', 'help'):
+            raise argparse.ArgumentTypeError(f'unknown message kind {kind!r}')
+        weights[kind] = float(weight or 1)
+    return weights
+
+
+def faq_names() -> list:
+    # the database in the repo may predate the aliases table
+    with sqlite3.connect(DATABASE_FILE) as connection:
+        tables = {row[0] for row in connection.execute(" SELECT name FROM sqlite_master WHERE type = 'table'; ")}
+        names = [row[0] for row in connection.execute(" SELECT command FROM commands; ")]
+        if 'aliases' in tables:
+            names += [row[0] for row in connection.execute(" SELECT alias FROM aliases; ")]
+    return names
+
+
+def prepare(directory: str, coalesce_window: float):
+    shutil.copy(DATABASE_FILE, directory)
+    os.symlink(os.path.join(ROOT, 'cogs'), os.path.join(directory, 'cogs'))
+
+    config = configobj.ConfigObj(DEFAULT_CONFIG)
+    config['Bot']['Secrets']['Token'] = 'fake-token'
+    config['Bot']['CoalesceWindow'] = coalesce_window
+    config.filename = os.path.join(directory, CONFIG_FILE)
+    config.write()
+
+
+def percentile(samples: list, fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else float('nan')
+
+
+class LoadTest:
+    __slots__ = ['fake', 'channel_id', 'rng', 'names', 'weights', 'pending', 'by_number', 'by_message',
+                 'latencies', 'sent', 'unmatched', 'last_reply']
+
+    def __init__(self, fake: FakeDiscord, channel_id: int, weights: dict, seed: int = 0):
+        self.fake = fake
+        self.channel_id = channel_id
+        self.rng = random.Random(seed)
+        self.names = [name for name in faq_names() if len(name) > 2]
+        self.weights = weights
+        self.pending = dict()  # user ID -> (kind, sent at)
+        self.by_number = dict()  # load user number -> user ID
+        self.by_message = dict()  # message ID -> user ID
+        self.latencies = collections.defaultdict(list)
+        self.sent = collections.Counter()
+        self.unmatched = 0
+        self.last_reply = None
+        fake.on_reply = self.on_reply
+
+    def content(self, kind: str) -> str:
+        if kind == 'faq':
+            return f'${self.rng.choice(self.names)}'
+        if kind == 'typo':
+            return f'${typo(self.rng.choice(self.names), self.rng)}'
+        if kind == 'magic':
+            return f'$magic {self.rng.randint(1000, 50000000)} {self.rng.randint(100, 700)} -asle'
+        return '$help'
+
+    async def send(self, number: int):
+        kind = self.rng.choices(list(self.weights), weights=list(self.weights.values()))[0]
+        author = self.fake.user(f'load{number}')
+        user_id = int(author['id'])
+
+        self.by_number[number] = user_id
+        self.pending[user_id] = (kind, time.perf_counter())
+        self.sent[kind] += 1
+        message = await self.fake.send_message(self.channel_id, author, self.content(kind))
+        self.by_message[int(message['id'])] = user_id
+
+    def on_reply(self, kind: str, channel_id: int, payload: dict):
+        if kind == 'reaction':
+            user_id = self.by_message.get(int(payload['message_id']))
+        else:
+            user_id = None
+            for embed in payload['embeds']:
+                if match := USER_NAME.match(embed.get('author', {}).get('name', '')):
+                    user_id = self.by_number.get(int(match.group(1)))
+            if user_id is None and (match := MENTION.search(payload['content'])):
+                user_id = int(match.group(1))
+            if user_id is None:
+                for recipient, channel in self.fake.dm_channels.items():
+                    if int(channel['id']) == channel_id:
+                        user_id = recipient
+
+        if (entry := self.pending.pop(user_id, None)) is None:
+            # later replies to an already answered message, or log embeds
+            self.unmatched += 1
+            return
+
+        message_kind, sent_at = entry
+        self.last_reply = time.perf_counter()
+        self.latencies[message_kind].append(self.last_reply - sent_at)
+
+    async def run(self, rate: float, duration: float, drain: float):
+        start = time.perf_counter()
+        number = 0
+        while time.perf_counter() - start < duration:
+            await self.send(number)
+            number += 1
+            await asyncio.sleep(max(0.0, number / rate - (time.perf_counter() - start)))
+        sending = time.perf_counter() - start
+
+        # typos with no similar FAQ name are never answered, so this may run out the clock
+        deadline = time.perf_counter() + drain
+        while self.pending and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        return sending, max(sending, (self.last_reply or start) - start)
+
+    def report(self, rate: float, sending: float, total: float) -> dict:
+        answered = sum(len(samples) for samples in self.latencies.values())
+        kinds = dict()
+        for kind, count in sorted(self.sent.items()):
+            samples = sorted(self.latencies[kind])
+            kinds[kind] = {
+                'sent': count,
+                'answered': len(samples),
+                'p50_ms': percentile(samples, 0.50) * 1e3,
+                'p90_ms': percentile(samples, 0.90) * 1e3,
+                'p99_ms': percentile(samples, 0.99) * 1e3,
+                'max_ms': samples[-1] * 1e3 if samples else float('nan'),
+            }
+
+        return {
+            'target_rate': rate,
+            'offered_rate': sum(self.sent.values()) / sending,
+            'throughput': answered / total,
+            'sent': sum(self.sent.values()),
+            'answered': answered,
+            'unanswered': len(self.pending),
+            'rate_limited': self.fake.counters['429'],
+            'rest_requests': self.fake.counters['rest'],
+            'kinds': kinds,
+        }
+
+
+def print_report(report: dict):
+    print(f'offered {report["offered_rate"]:.1f} msg/s (target {report["target_rate"]:.1f}), '
+          f'answered {report["throughput"]:.1f} msg/s, {report["unanswered"]} unanswered, '
+          f'{report["rate_limited"]} 429s in {report["rest_requests"]} REST requests')
+    print(f'{"kind":<8}{"sent":>8}{"answered":>10}{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+    for kind, result in report['kinds'].items():
+        print(f'{kind:<8}{result["sent"]:>8}{result["answered"]:>10}{result["p50_ms"]:>10.1f}'
+              f'{result["p90_ms"]:>10.1f}{result["p99_ms"]:>10.1f}{result["max_ms"]:>10.1f}')
+
+
+async def main(arguments: argparse.Namespace):
+    fake = FakeDiscord(
+        bot_channel_id=DEFAULT_CONFIG['Bot']['Channel'],
+        log_channel_id=DEFAULT_CONFIG['Logging']['Channel'],
+        rate_limit=arguments.rate_limit,
+        rate_period=arguments.rate_period,
+        advertise_limits=not arguments.hide_limits
+    )
+    url = await fake.start()
+    test = LoadTest(fake, DEFAULT_CONFIG['Bot']['Channel'], arguments.mix)
+
+    with tempfile.TemporaryDirectory() as directory:
+        prepare(directory, arguments.coalesce_window)
+        environment = dict(os.environ, PYTHONPATH=ROOT)
+        bot = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'benchmarks.fakediscord', '--api', url, cwd=directory, env=environment,
+            stdout=None if arguments.verbose else asyncio.subprocess.DEVNULL
+        )
+        try:
+            await asyncio.wait_for(fake.ready.wait(), timeout=60)
+            sending, total = await test.run(arguments.rate, arguments.duration, arguments.drain)
+        finally:
+            bot.send_signal(signal.SIGINT)
+            try:
+                await asyncio.wait_for(bot.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                bot.kill()
+            await fake.stop()
+
+    report = test.report(arguments.rate, sending, total)
+    print_report(report)
+    if arguments.output:
+        with open(arguments.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+        print(f'report written to {arguments.output}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-r', '--rate', type=float, default=20.0, help='messages per second')
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='seconds to send messages for')
+    parser.add_argument('-m', '--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'weights per message kind, default {DEFAULT_MIX}')
+    parser.add_argument('--rate-limit', type=int, default=5, help='sends per channel per rate period')
+    parser.add_argument('--rate-period', type=float, default=5.0, help='seconds per rate limit window')
+    parser.add_argument('--hide-limits', action='store_true',
+                        help='leave rate limit headers off successful responses so the bot runs into 429s')
+    parser.add_argument('--coalesce-window', type=float, default=0.0,
+                        help='Bot/CoalesceWindow for the run; 0 answers every message')
+    parser.add_argument('--drain', type=float, default=30.0, help='seconds to wait for outstanding replies')
+    parser.add_argument('-o', '--output', help='where to write the JSON report')
+    parser.add_argument('-v', '--verbose', action='store_true', help='show the bot\'s output')
+    asyncio.run(main(parser.parse_args()))
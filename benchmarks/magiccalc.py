@@ -0,0 +1,99 @@
+"""Checks calc_magic against the sympy solver it replaced and times both
+
+The parity check walks a grid of monster HP and modifiers (a few spell attacks
+with every multiplier combination the $magic command can produce). sympy's float
+root sometimes lands just above an exact integer answer and rounds up one too
+far; those pairs are checked in exact rational arithmetic instead, and any other
+difference fails the check. sympy is only needed for the comparison, which takes
+a few minutes since every sympy solve costs tens of milliseconds.
+
+Usage: python -m benchmarks.magiccalc [-n ITERATIONS] [--no-parity]
+"""
+
+import argparse
+import itertools
+import math
+import os
+import sys
+import time
+from fractions import Fraction
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from windiautils.magiccalc import calc_magic  # noqa: E402
+
+MULTIPLIERS = [staff * element * amp
+               for staff in (1.0, 1.25) for element in (1.0, 1.5, 0.5) for amp in (1.0, 1.3, 1.4)]
+HPS = sorted({int(10 ** (exponent / 2)) for exponent in range(0, 19, 2)} | {7, 237, 56234, 43376970, 2100000000})
+SPELL_ATTACKS = (10, 158, 570)
+
+
+def sympy_calc_magic(monster_hp: int, modifier: float = 1.0):
+    from sympy import Symbol
+    from sympy.solvers import solve
+
+    x = Symbol('x')
+    mastery = 0.6
+
+    solution = solve(((((x ** 2) / 1000.0 + x * mastery * 0.9) / 30.0 + x / 200.0) * modifier) / monster_hp - 1.0,
+                     x)
+
+    return min([math.ceil(num) for num in solution if num >= 0.0])
+
+
+def exact_damage(magic: int, modifier: float):
+    return ((Fraction(magic) ** 2 / 1000 + magic * Fraction('0.54')) / 30 + Fraction(magic, 200)) * Fraction(modifier)
+
+
+def is_exact_answer(magic: int, hp: int, modifier: float):
+    return exact_damage(magic, modifier) >= hp and (magic == 0 or exact_damage(magic - 1, modifier) < hp)
+
+
+def check_parity():
+    grid = list(itertools.product(HPS, (1.0 * attack * multiplier
+                                        for attack in SPELL_ATTACKS for multiplier in MULTIPLIERS)))
+    boundaries = 0
+    for hp, modifier in grid:
+        expected = sympy_calc_magic(hp, modifier)
+        actual = calc_magic.__wrapped__(hp, modifier)
+        if expected == actual:
+            continue
+        if expected == actual + 1 and is_exact_answer(actual, hp, modifier):
+            boundaries += 1
+            continue
+        raise AssertionError(f'calc_magic({hp}, {modifier}) = {actual}, sympy gives {expected}')
+    return len(grid), boundaries
+
+
+def main(iterations: int, parity: bool):
+    if parity:
+        pairs, boundaries = check_parity()
+        print(f'parity: {pairs} HP/modifier pairs match sympy '
+              f'({boundaries} exact integer answers sympy rounds up past)')
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        sympy_calc_magic(43376970 + i, 570 * 1.25 * 1.5 * 1.4)
+    sympy_time = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        calc_magic.__wrapped__(43376970 + i, 570 * 1.25 * 1.5 * 1.4)
+    closed_time = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        calc_magic(43376970, 570 * 1.25 * 1.5 * 1.4)
+    cached_time = (time.perf_counter() - start) / iterations
+
+    print(f'sympy solve:  {sympy_time * 1e6:>10.2f} us/call')
+    print(f'closed form:  {closed_time * 1e6:>10.2f} us/call')
+    print(f'cached:       {cached_time * 1e6:>10.2f} us/call')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--iterations', type=int, default=50)
+    parser.add_argument('--no-parity', dest='parity', action='store_false')
+    arguments = parser.parse_args()
+    main(arguments.iterations, arguments.parity)
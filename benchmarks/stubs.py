@@ -0,0 +1,143 @@
+"""Offline stand-ins for the discord.py objects the cogs touch
+
+Only the attributes and coroutines the bot actually uses are implemented.
+Sends never leave the process; each returns a StubMessage so callers that
+inspect the sent message (jump_url, id) keep working.
+"""
+
+import itertools
+
+import discord
+
+_ids = itertools.count(800000000000000000)
+
+
+def next_id() -> int:
+    return next(_ids)
+
+
+# the role that makes a StubUser a moderator; permissions are cached by role, so moderators need one
+MODERATOR_ROLE_ID = next_id()
+
+
+class StubUser:
+    __slots__ = ['id', 'name', 'discriminator', 'bot', 'moderator', 'guild', 'sent', 'roles']
+
+    avatar_url = 'https://cdn.discordapp.com/embed/avatars/0.png'
+
+    def __init__(self, name: str = 'tester', *, moderator: bool = False, guild: 'StubGuild' = None):
+        self.id = next_id()
+        self.name = name
+        self.discriminator = '0001'
+        self.bot = False
+        self.moderator = moderator
+        self.guild = guild
+        self.sent = 0
+        self.roles = [discord.Object(MODERATOR_ROLE_ID)] if moderator else []
+
+    def __str__(self):
+        return f'{self.name}#{self.discriminator}'
+
+    @property
+    def mention(self) -> str:
+        return f'<@{self.id}>'
+
+    @property
+    def display_name(self) -> str:
+        return self.name
+
+    @property
+    def dm_channel(self):
+        # the user doubles as their own DM channel
+        return self
+
+    async def create_dm(self):
+        return self
+
+    async def send(self, content: str = None, **kwargs):
+        self.sent += 1
+        return StubMessage(content or '', channel=self, author=None)
+
+
+# so the outbox sends to the user's DM channel, as it does for real users and members
+discord.abc.User.register(StubUser)
+
+
+class StubChannel:
+    __slots__ = ['id', 'name', 'guild', 'sent']
+
+    _overwrites = ()
+
+    def __init__(self, name: str, guild: 'StubGuild' = None, *, channel_id: int = None):
+        self.id = channel_id or next_id()
+        self.name = name
+        self.guild = guild
+        self.sent = 0
+
+    def permissions_for(self, member: StubUser) -> discord.Permissions:
+        return discord.Permissions(manage_messages=member.moderator, send_messages=True)
+
+    async def send(self, content: str = None, **kwargs):
+        self.sent += 1
+        return StubMessage(content or '', channel=self, author=None)
+
+
+class StubGuild:
+    __slots__ = ['id', 'name', 'owner_id', '_channels']
+
+    def __init__(self, name: str = 'Windia'):
+        self.id = next_id()
+        self.name = name
+        self.owner_id = None
+        self._channels = dict()
+
+    @property
+    def channels(self):
+        return list(self._channels.values())
+
+    def add_channel(self, name: str, *, channel_id: int = None) -> StubChannel:
+        channel = StubChannel(name, self, channel_id=channel_id)
+        self._channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+
+class StubMessage:
+    __slots__ = ['id', 'content', 'channel', 'author', 'reactions']
+
+    def __init__(self, content: str, *, channel, author: StubUser):
+        self.id = next_id()
+        self.content = content
+        self.channel = channel
+        self.author = author
+        self.reactions = 0
+
+    @property
+    def guild(self):
+        return getattr(self.channel, 'guild', None)
+
+    @property
+    def jump_url(self) -> str:
+        guild = self.guild.id if self.guild else '@me'
+        return f'https://discord.com/channels/{guild}/{self.channel.id}/{self.id}'
+
+    async def add_reaction(self, emoji: str):
+        self.reactions += 1
+
+
+class StubContext:
+    """Enough of commands.Context to call a command's callback directly"""
+    __slots__ = ['message', 'bot']
+
+    def __init__(self, bot, message: StubMessage):
+        self.bot = bot
+        self.message = message
+
+    channel = property(lambda self: self.message.channel)
+    author = property(lambda self: self.message.author)
+    guild = property(lambda self: self.message.guild)
+
+    async def send(self, content: str = None, **kwargs):
+        return await self.message.channel.send(content, **kwargs)
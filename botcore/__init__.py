@@ -1 +1,6 @@
 from .bot import Bot
+from .access import *
+from .compute import *
+from .metrics import *
+from .profiler import *
+from .outbox import *
@@ -0,0 +1,146 @@
+import collections
+from typing import (
+    Dict,
+    FrozenSet,
+    Hashable,
+    NoReturn,
+    Optional,
+    Tuple
+)
+
+import discord
+
+import windiautils
+
+__all__ = ['AccessCache', 'Access']
+
+# past this many entries a guild's cache is started over rather than evicted entry by entry
+MAX_ENTRIES_PER_GUILD = 4096
+MAX_MEMBERS_PER_GUILD = 65536
+
+# whether a member may use FAQ commands in a channel, whether the channel is the bot channel (or there is
+# none), and whether the member may manage messages in the channel
+Access = collections.namedtuple('Access', ['faq_allowed', 'bot_channel', 'moderator'])
+
+DIRECT_ACCESS = Access(faq_allowed=True, bot_channel=True, moderator=False)
+
+AccessStats = collections.namedtuple('AccessStats', ['guilds', 'entries', 'hits', 'misses', 'invalidations'])
+
+
+class _GuildAccess:
+    __slots__ = ['bot_channel_id', 'personal', 'entries', 'role_keys']
+
+    def __init__(self, guild: discord.Guild, bot_channel_id: int):
+        self.bot_channel_id = bot_channel_id
+        # members whose permissions do not follow from their roles alone: the owner and anyone with a
+        # permission overwrite of their own
+        self.personal: FrozenSet[int] = frozenset((
+            guild.owner_id,
+            *(overwrite.id for channel in guild.channels for overwrite in getattr(channel, '_overwrites', ())
+              if overwrite.type == 'member')
+        ))
+        self.entries: Dict[Hashable, Access] = dict()
+        # each member's sorted role ids, since Member.roles builds and sorts a new list on every access
+        self.role_keys: Dict[int, Tuple[int, ...]] = dict()
+
+
+class AccessCache:
+    """Caches what members may do in each guild channel, keyed by their roles
+
+    Resolving permissions walks every role and every overwrite of a channel,
+    yet members with the same roles always get the same answer in the same
+    channel. Answers are therefore cached per guild under (channel id, role
+    ids), so routing a message costs a dict lookup once its combination was
+    seen. Each member's sorted role ids are kept as well, so Member.roles is
+    not rebuilt per message. Members whose permissions do not follow from
+    their roles, the owner and members with overwrites of their own, are
+    cached under their id.
+
+    The Bot drops a guild's answers whenever one of its channels, roles or
+    its owner changes, and when a member with an overwrite of their own has
+    their roles changed; any other member whose roles change or who leaves
+    only has their role ids forgotten. `Bot/Channel` is read on every lookup,
+    so editing it takes effect at once.
+
+    Methods
+    -------
+    def resolve(channel: discord.abc.Messageable, member: discord.abc.User) -> Access
+        Returns what a member may do in a channel
+
+    def invalidate(guild_id: int = None)
+        Drops the cached answers of a guild, or of every guild
+
+    def invalidate_member(guild_id: int, member_id: int)
+        Forgets a member's roles, and drops a guild's cached answers if they depend on the member's own overwrites
+
+    def stats() -> AccessStats
+        Returns the number of cached answers, hits, misses and invalidations
+    """
+    __slots__ = ['config', '_guilds', '_counters']
+
+    def __init__(self, config: windiautils.Config):
+        self.config = config
+        self._guilds: Dict[int, _GuildAccess] = dict()
+        self._counters = collections.Counter()
+
+    def resolve(self, channel: discord.abc.Messageable, member: discord.abc.User) -> Access:
+        if (guild := getattr(channel, 'guild', None)) is None:
+            return DIRECT_ACCESS
+
+        bot_channel_id = self.config.getint('Bot', 'Channel')
+        state = self._guilds.get(guild.id)
+        if state is None or state.bot_channel_id != bot_channel_id:
+            state = self._guilds[guild.id] = _GuildAccess(guild, bot_channel_id)
+
+        if member.id in state.personal:
+            key = (channel.id, member.id)
+        else:
+            if (roles := state.role_keys.get(member.id)) is None:
+                if len(state.role_keys) >= MAX_MEMBERS_PER_GUILD:
+                    state.role_keys.clear()
+                roles = state.role_keys[member.id] = tuple(sorted(role.id for role in getattr(member, 'roles', ())))
+            key = (channel.id, roles)
+
+        if (access := state.entries.get(key)) is not None:
+            self._counters['hits'] += 1
+            return access
+
+        self._counters['misses'] += 1
+        if len(state.entries) >= MAX_ENTRIES_PER_GUILD:
+            state.entries.clear()
+        access = state.entries[key] = self._compute(guild, channel, member, bot_channel_id)
+        return access
+
+    @staticmethod
+    def _compute(guild: discord.Guild, channel: discord.abc.GuildChannel, member: discord.Member,
+                 bot_channel_id: int) -> Access:
+        moderator = channel.permissions_for(member).manage_messages
+        if (bot_channel := guild.get_channel(bot_channel_id)) is None or channel.id == bot_channel.id:
+            return Access(faq_allowed=True, bot_channel=True, moderator=moderator)
+        return Access(
+            faq_allowed=bot_channel.permissions_for(member).manage_messages, bot_channel=False, moderator=moderator
+        )
+
+    def invalidate(self, guild_id: Optional[int] = None) -> NoReturn:
+        self._counters['invalidations'] += 1
+        if guild_id is None:
+            self._guilds.clear()
+        else:
+            self._guilds.pop(guild_id, None)
+
+    def invalidate_member(self, guild_id: int, member_id: int) -> NoReturn:
+        if (state := self._guilds.get(guild_id)) is None:
+            return
+        if member_id in state.personal:
+            self.invalidate(guild_id)
+        else:
+            state.role_keys.pop(member_id, None)
+
+    def stats(self) -> AccessStats:
+        return AccessStats(
+            guilds=len(self._guilds),
+            entries=sum(len(state.entries) for state in self._guilds.values()),
+            hits=self._counters['hits'],
+            misses=self._counters['misses'],
+            invalidations=self._counters['invalidations']
+        )
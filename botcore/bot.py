@@ -1,18 +1,207 @@
-from typing import Tuple
+import re
+import time
+from typing import (
+    Optional,
+    Tuple
+)
 
 import discord.utils
 from discord.ext import commands
 
 import windiautils
+from .access import AccessCache
+from .compute import ComputeService
+from .metrics import LoopLagMonitor, MetricsServer, Stall
+from .outbox import Outbox, PRIORITY_LOG
+
+ROUTE_COMMAND = 'command'
+ROUTE_FAQ = 'faq'
+
+# the first word after the prefix, matched in place so the rest of the message is never copied
+_TOKEN = re.compile(r'\S*')
+
+
+def parse_command(content: str, prefix: str) -> Optional[str]:
+    """Returns the lowercased first word after the prefix, or None if the content is not prefixed"""
+
+    if not content.startswith(prefix):
+        return None
+
+    return _TOKEN.match(content, len(prefix)).group(0).lower()
 
 
 class Bot(commands.Bot):
-    __slots__ = ['config']
+    __slots__ = ['config', 'database', 'compute', 'outbox', 'metrics', 'usage', 'access', 'lag_monitor',
+                 'command_generation', '_routes', '_routes_generation', '_config_watcher', '_usage_flusher',
+                 '_metrics_server']
 
     def __init__(self, command_prefix: str):
         self.config = windiautils.Config.getInstance()
+        self.database = windiautils.Database.getInstance()
+        self.compute = ComputeService(
+            workers=self.config.getint('Compute', 'Workers', 2),
+            max_queue=self.config.getint('Compute', 'MaxQueue', 16),
+            timeout=float(self.config.get('Compute', 'Timeout', 10.0))
+        )
+        self.outbox = Outbox(max_queue=self.config.getint('Outbox', 'MaxQueue', 64))
+        self.metrics = windiautils.Metrics.getInstance()
+        self.metrics.add_collector(self.collect_metrics)
+        self.usage = windiautils.Usage.getInstance()
+        self.access = AccessCache(self.config)
+        self.lag_monitor = LoopLagMonitor(
+            self.metrics,
+            interval=float(self.config.get('Metrics', 'LagInterval', 0.5)),
+            threshold=float(self.config.get('Metrics', 'StallThreshold', 0.5)),
+            on_stall=self.report_loop_stall
+        )
+        self._metrics_server = None
+        self.command_generation = 0
+        self._routes = None
+        self._routes_generation = None
+        self._config_watcher = None
+        self._usage_flusher = None
         super().__init__(command_prefix, help_command=None)
 
+    def add_command(self, command: commands.Command):
+        super().add_command(command)
+        self.command_generation += 1
+        self._routes = None
+
+    def remove_command(self, name: str) -> Optional[commands.Command]:
+        command = super().remove_command(name)
+        self.command_generation += 1
+        self._routes = None
+        return command
+
+    def route(self, token: str) -> Optional[str]:
+        """Returns whether a token names a bot command, a FAQ command or neither
+
+        Bot commands and FAQ names share one table, rebuilt only after a command
+        is added or removed or the FAQ names change, so routing a message costs a
+        single dict lookup. Bot commands win over FAQ commands of the same name.
+        """
+
+        if self._routes is None or self._routes_generation != windiautils.generation():
+            routes = dict.fromkeys(windiautils.command_names(), ROUTE_FAQ)
+            routes.update(dict.fromkeys(self.all_commands, ROUTE_COMMAND))
+            self._routes = routes
+            self._routes_generation = windiautils.generation()
+
+        return self._routes.get(token)
+
+    async def start(self, *args, **kwargs):
+        """Opens the shared database connection and then logs into Discord
+
+        await start(*args, **kwargs)
+
+        This is a coroutine. This is not called directly; it is called by run.
+        The FAQ cache is filled here so the first FAQ message does not pay for it,
+        the configuration file starts being watched for edits, FAQ usage starts
+        being flushed every `Usage/FlushInterval` seconds, and the loop lag
+        monitor and metrics endpoint are started. The endpoint stays off unless
+        `Metrics/Port` is set to a port other than 0, the default.
+        """
+
+        await self.database.connect()
+        await windiautils.load_commands()
+        self._config_watcher = self.loop.create_task(self.config.watch())
+        flush_interval = float(self.config.get('Usage', 'FlushInterval', 60.0))
+        self._usage_flusher = self.loop.create_task(self.usage.run(flush_interval))
+        self.lag_monitor.start(self.loop)
+        if port := self.config.getint('Metrics', 'Port', windiautils.METRICS_PORT):
+            self._metrics_server = MetricsServer(self.metrics)
+            try:
+                await self._metrics_server.start(self.config.get('Metrics', 'Host', '127.0.0.1'), port)
+            except OSError as error:
+                print(f'Could not serve metrics on port {port}: {error}')
+                self._metrics_server = None
+        await super().start(*args, **kwargs)
+
+    async def close(self):
+        """Logs out of Discord, saves the configuration and FAQ usage and closes the database, compute pool and outbox
+
+        await close()
+
+        This is a coroutine. This is called by run when the bot is shutting down.
+        """
+
+        await super().close()
+        self.outbox.shutdown()
+        self.lag_monitor.stop()
+        if self._metrics_server:
+            await self._metrics_server.stop()
+        if self._config_watcher:
+            self._config_watcher.cancel()
+        if self._usage_flusher:
+            self._usage_flusher.cancel()
+        await self.config.flush()
+        try:
+            await self.usage.flush()
+        except Exception as error:
+            print(f'Could not flush FAQ usage: {error!r}')
+        await self.database.close()
+        self.compute.shutdown()
+
+    async def invoke(self, ctx: commands.Context):
+        """Invokes a command and records how long it took, errors included
+
+        await invoke(ctx: discord.ext.commands.Context)
+
+        This is a coroutine. This is not called directly; it is called by
+        process_commands.
+        """
+
+        start = time.perf_counter()
+        try:
+            await super().invoke(ctx)
+        finally:
+            if ctx.command:
+                self.metrics.observe(
+                    'command_seconds',
+                    time.perf_counter() - start,
+                    command=ctx.command.qualified_name,
+                    status='failed' if ctx.command_failed else 'ok'
+                )
+
+    def collect_metrics(self, metrics: windiautils.Metrics):
+        """Refreshes the gauges that mirror the bot's own state before metrics are read"""
+
+        metrics.set_gauge('uptime_seconds', time.time() - metrics.started)
+        metrics.set_gauge('gateway_latency_seconds', self.latency)
+        metrics.set_gauge('loop_lag_last_seconds', self.lag_monitor.last)
+
+        for name, value in self.compute.stats()._asdict().items():
+            metrics.set_gauge(f'compute_{name}', float(value))
+
+        outbox = self.outbox.stats()
+        for name, value in outbox._asdict().items():
+            if name != 'queued_by_priority':
+                metrics.set_gauge(f'outbox_{name}', float(value))
+        for priority, queued in outbox.queued_by_priority.items():
+            metrics.set_gauge('outbox_queued_by_priority', queued, priority=priority)
+
+        for name, value in windiautils.cache_info()._asdict().items():
+            metrics.set_gauge(f'faq_cache_{name}', float(value))
+        metrics.set_gauge('usage_pending', float(self.usage.pending))
+        for name, value in self.access.stats()._asdict().items():
+            metrics.set_gauge(f'access_cache_{name}', float(value))
+
+    def report_loop_stall(self, stall: Stall):
+        """Reports an event loop stall caught by the lag monitor
+
+        This is not called directly; the lag monitor calls it once the loop runs
+        again after being blocked for longer than `Metrics/StallThreshold`.
+        """
+
+        print(f'The event loop was blocked for at least {stall.blocked * 1000:.0f} ms in:')
+        print(stall.stack)
+        # the innermost frames are at the end and are the ones that matter
+        self.loop.create_task(self.log(
+            '**EVENT LOOP STALL**',
+            ('Blocked for', f'at least {stall.blocked * 1000:.0f} ms'),
+            ('Stack', f'```{stall.stack[-950:]}```')
+        ))
+
     async def on_ready(self):
         """Alerts the user that the bot is initialized
         
@@ -34,9 +223,10 @@ class Bot(commands.Bot):
         This is a coroutine. This is not called directly; it is fired whenever the 
         Bot receives a message. This is used for attempting to parse the message 
         for a command. If the message is sent by a bot, it is ignored. If the message 
-        begins with the command prefix, it is then tested for membership in the bot's 
-        stored commands. If it passes, then the message is processed by a bot as a
-        command.
+        begins with the command prefix, its first word is looked up once with route.
+        Bot commands are processed by the command framework, anything else fires
+        `on_faq(message, command)` for a FAQ command or `on_faq_miss(message, command)`
+        for an unknown word. Messages without the prefix fire `on_chat(message)`.
         
         Parameters
         ----------
@@ -47,22 +237,76 @@ class Bot(commands.Bot):
         if message.author.bot:
             return
 
-        if message.content.startswith(self.command_prefix):
-            raw_command = message.content.lower()[1::].split(' ')
-            command = raw_command[0]
+        if not (command := parse_command(message.content, self.command_prefix)):
+            self.dispatch('chat', message)
+            return
+
+        route = self.route(command)
+        if route == ROUTE_COMMAND:
+            await self.process_commands(message)
+        elif route == ROUTE_FAQ:
+            self.dispatch('faq', message, command)
+        else:
+            self.dispatch('faq_miss', message, command)
+
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        """Drops the guild's cached permissions, since the channel may be the bot channel"""
+
+        self.access.invalidate(channel.guild.id)
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        """Drops the guild's cached permissions, since the channel may have been the bot channel"""
+
+        self.access.invalidate(channel.guild.id)
+
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        """Drops the guild's cached permissions, since the channel's overwrites may have changed"""
+
+        self.access.invalidate(after.guild.id)
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        """Drops the guild's cached permissions, since the role's permissions may have changed"""
+
+        self.access.invalidate(after.guild.id)
+
+    async def on_guild_role_delete(self, role: discord.Role):
+        """Drops the guild's cached permissions, since they were resolved with the role"""
+
+        self.access.invalidate(role.guild.id)
+
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        """Drops the guild's cached permissions, since its owner may have changed"""
+
+        self.access.invalidate(after.id)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.access.invalidate(guild.id)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        """Forgets the member's cached roles, or the guild's permissions if they were cached for the member alone
+
+        Permissions of everyone else are cached by their roles, so a member whose
+        roles change simply looks up another entry.
+        """
+
+        if {role.id for role in before.roles} != {role.id for role in after.roles}:
+            self.access.invalidate_member(after.guild.id, after.id)
+
+    async def on_member_remove(self, member: discord.Member):
+        """Forgets the member's cached roles, so they are looked up again should the member rejoin"""
 
-            if self.get_command(command):
-                await self.process_commands(message)
+        self.access.invalidate_member(member.guild.id, member.id)
 
     async def log(self, event: str, *messages: Tuple[str, str]):
-        logging_channel_id = await self.config.aiogetint('Logging', 'Channel')
+        logging_channel_id = self.config.getint('Logging', 'Channel')
         if channel := self.get_channel(logging_channel_id):
-            return await windiautils.send_embed(
-                title=event,
-                description='',
-                messageable=channel,
-                author=self.user,
-                fields=messages
+            # logs go out after everything else, and a repeat of a still queued log replaces it
+            template = windiautils.compile_embed(title=event, description='', fields=messages)
+            return await self.outbox.send(
+                channel,
+                PRIORITY_LOG,
+                key=(event, template.fields),
+                embed=windiautils.render_template(template, self.user)
             )
         else:
             print()
@@ -0,0 +1,194 @@
+import asyncio
+import collections
+import concurrent.futures
+import time
+from typing import (
+    Any,
+    Callable,
+    NoReturn,
+    Optional
+)
+
+__all__ = ['ComputeService', 'ComputeError', 'ComputeBusy', 'ComputeTimeout']
+
+ComputeStats = collections.namedtuple('ComputeStats', [
+    'workers', 'running', 'queued', 'utilization', 'submitted', 'completed', 'rejected', 'timed_out',
+    'average_wait', 'max_wait'
+])
+
+
+class ComputeError(Exception):
+    """Base class for errors raised by ComputeService.run"""
+
+
+class ComputeBusy(ComputeError):
+    """Raised when too many jobs are already waiting for a worker"""
+
+
+class ComputeTimeout(ComputeError):
+    """Raised when a job does not finish within its timeout"""
+
+
+class ComputeService:
+    """A bounded process pool for pure, CPU-bound functions
+
+    Work done in a process does not hold the event loop, nor the GIL, so a
+    heavy job such as rebuilding the FAQ keyword index cannot delay FAQ
+    replies. At most `workers` jobs run at once and at most `max_queue` jobs
+    may be running or waiting; further calls fail fast with ComputeBusy. A job
+    that outlives its timeout, or whose caller is cancelled, is abandoned: its
+    caller gets an error at once and its result is discarded. A job that
+    already started in a worker cannot be stopped, so it keeps its worker, and
+    counts as running and towards `max_queue`, until it finishes; the bounds
+    therefore hold however many jobs are abandoned.
+
+    Every call pickles its function, arguments and result across processes, so
+    only work taking well over a millisecond belongs here; calc_magic, a closed
+    form with an lru_cache, is cheaper to call inline.
+
+    Members
+    -------
+    workers: int
+        The number of worker processes
+
+    max_queue: int
+        The number of jobs that may be running or waiting at once
+
+    timeout: float
+        The default number of seconds a job may take, including waiting time
+
+    Methods
+    -------
+    async def run(func: Callable, *args[, timeout: float = None]) -> Any
+        Runs func(*args) in a worker process and returns its result
+
+    def stats() -> ComputeStats
+        Returns pool utilization, job counters and queue wait times
+
+    def shutdown()
+        Stops the worker processes
+    """
+    __slots__ = ['workers', 'max_queue', 'timeout', '_executor', '_slots', '_running', '_pending', '_counters',
+                 '_waits']
+
+    def __init__(self, workers: int = 2, max_queue: int = 16, timeout: float = 10.0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = None
+        self._slots = None
+        self._running = 0
+        self._pending = 0
+        self._counters = collections.Counter()
+        self._waits = [0.0, 0, 0.0]  # total seconds, count, max seconds
+
+    async def run(self, func: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """Runs func(*args) in a worker process and returns its result
+
+        await run(func: Callable, *args[, timeout: float = None])
+
+        This is a coroutine. `func` and its arguments must be picklable, so
+        module-level functions and classes work but lambdas and bound methods
+        do not.
+
+        Parameters
+        ----------
+        func: Callable
+            The function to call in the worker process
+
+        timeout: float = None
+            Overrides the service's default timeout for this job
+
+        Raises
+        ------
+        ComputeBusy
+            The queue is full
+        ComputeTimeout
+            The job took longer than the timeout
+        """
+
+        if self._pending >= self.max_queue:
+            self._counters['rejected'] += 1
+            raise ComputeBusy(f'{self._pending} jobs are already queued')
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+            self._slots = asyncio.Semaphore(self.workers)
+
+        timeout = timeout or self.timeout
+        future = None
+        self._pending += 1
+        self._counters['submitted'] += 1
+        queued = time.perf_counter()
+        try:
+            await self._acquire(timeout)
+            wait = time.perf_counter() - queued
+            self._waits[0] += wait
+            self._waits[1] += 1
+            self._waits[2] = max(self._waits[2], wait)
+
+            try:
+                future = self._executor.submit(func, *args)
+            except BaseException:
+                self._slots.release()
+                raise
+            self._running += 1
+            loop = asyncio.get_event_loop()
+            future.add_done_callback(lambda done: self._finished(loop, done))
+
+            # cancelling the wrapper only stops a job that has not reached a worker yet; one that has keeps its
+            # slot until it finishes, see _finish
+            return await asyncio.wait_for(asyncio.wrap_future(future), max(timeout - wait, 0.0))
+        except asyncio.TimeoutError:
+            self._counters['timed_out'] += 1
+            raise ComputeTimeout(f'{getattr(func, "__name__", func)} took longer than {timeout}s')
+        finally:
+            if future is None:
+                # never submitted, so _finish will not count it
+                self._pending -= 1
+
+    async def _acquire(self, timeout: float) -> NoReturn:
+        # wait_for(acquire()) can lose a slot acquired just as it times out, so the acquire is shielded and a slot
+        # it got anyway is handed back
+        acquire = asyncio.ensure_future(self._slots.acquire())
+        try:
+            await asyncio.wait_for(asyncio.shield(acquire), timeout)
+        except BaseException:
+            if not acquire.cancel():
+                self._slots.release()
+            raise
+
+    def _finished(self, loop: asyncio.AbstractEventLoop, future: concurrent.futures.Future) -> NoReturn:
+        # called from the executor's thread, or from the loop when a job is cancelled before it starts
+        try:
+            loop.call_soon_threadsafe(self._finish, future)
+        except RuntimeError:
+            pass  # the loop is closed, and the pool with it
+
+    def _finish(self, future: concurrent.futures.Future) -> NoReturn:
+        # the worker is free again only now, whether or not anyone still awaits the job
+        self._running -= 1
+        self._pending -= 1
+        self._slots.release()
+        if not future.cancelled():
+            self._counters['completed'] += 1
+
+    def stats(self) -> ComputeStats:
+        total, count, longest = self._waits
+        return ComputeStats(
+            workers=self.workers,
+            running=self._running,
+            queued=self._pending - self._running,
+            utilization=self._running / self.workers,
+            submitted=self._counters['submitted'],
+            completed=self._counters['completed'],
+            rejected=self._counters['rejected'],
+            timed_out=self._counters['timed_out'],
+            average_wait=total / count if count else 0.0,
+            max_wait=longest
+        )
+
+    def shutdown(self) -> NoReturn:
+        if executor := self._executor:
+            self._executor = None
+            executor.shutdown(wait=False)
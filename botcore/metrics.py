@@ -0,0 +1,157 @@
+import asyncio
+import collections
+import threading
+import time
+from typing import (
+    Callable,
+    Deque,
+    NoReturn,
+    Optional
+)
+
+from aiohttp import web
+
+import windiautils
+from .profiler import format_thread_stack
+
+__all__ = ['MetricsServer', 'LoopLagMonitor', 'Stall']
+
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+STALL_HISTORY = 20
+
+# when a stall began (epoch seconds), how long the loop had been blocked when it was caught, and where
+Stall = collections.namedtuple('Stall', ['started', 'blocked', 'stack'])
+
+
+class MetricsServer:
+    """Serves the bot's metrics at /metrics in the Prometheus text format
+
+    Meant to be bound to localhost and scraped by a Prometheus agent on the
+    same machine; it has no authentication.
+
+    Methods
+    -------
+    async def start(host: str, port: int)
+        Starts listening
+
+    async def stop()
+        Stops listening
+    """
+    __slots__ = ['metrics', '_runner']
+
+    def __init__(self, metrics: windiautils.Metrics):
+        self.metrics = metrics
+        self._runner = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=self.metrics.render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+    async def start(self, host: str, port: int) -> NoReturn:
+        app = web.Application()
+        app.router.add_get('/metrics', self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        print(f'Serving metrics on http://{host}:{port}/metrics')
+
+    async def stop(self) -> NoReturn:
+        if runner := self._runner:
+            self._runner = None
+            await runner.cleanup()
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task and catches stalls
+
+    Every `interval` seconds the monitor sleeps and records how much longer
+    than asked the sleep took. Anything above a few milliseconds is time the
+    loop spent running something that did not yield.
+
+    A watchdog thread also checks how long ago the monitor last ran. Once that
+    passes the interval by more than `threshold` seconds, the loop is stuck in
+    one callback right now, so the thread captures the loop thread's stack,
+    which points at the code holding it. Stalls are kept in `stalls` and passed
+    to `on_stall` on the loop once it is running again.
+
+    Members
+    -------
+    last: float
+        The lag of the latest measurement in seconds
+
+    stalls: Deque[Stall]
+        The most recent stalls, oldest first
+
+    Methods
+    -------
+    def start(loop: asyncio.AbstractEventLoop)
+        Starts measuring in a task on the loop and starts the watchdog thread
+
+    def stop()
+        Stops measuring
+    """
+    __slots__ = ['metrics', 'interval', 'threshold', 'on_stall', 'last', 'stalls', '_task', '_beat', '_thread',
+                 '_stopped']
+
+    def __init__(self, metrics: windiautils.Metrics, interval: float = 0.5, threshold: float = 0.5,
+                 on_stall: Optional[Callable[[Stall], None]] = None):
+        self.metrics = metrics
+        self.interval = interval
+        self.threshold = threshold
+        self.on_stall = on_stall
+        self.last = 0.0
+        self.stalls: Deque[Stall] = collections.deque(maxlen=STALL_HISTORY)
+        self._task: Optional[asyncio.Task] = None
+        self._beat = time.perf_counter()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> NoReturn:
+        """Starts measuring; this must be called from the loop's own thread"""
+
+        self._beat = time.perf_counter()
+        self._stopped.clear()
+        self._task = loop.create_task(self.run())
+        if self.threshold > 0:
+            self._thread = threading.Thread(
+                target=self.watch, args=(loop, threading.get_ident()), name='loop-watchdog', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> NoReturn:
+        self._stopped.set()
+        if task := self._task:
+            self._task = None
+            task.cancel()
+
+    async def run(self) -> NoReturn:
+        while True:
+            start = self._beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._beat = time.perf_counter()
+            self.last = max(0.0, self._beat - start - self.interval)
+            self.metrics.observe('loop_lag_seconds', self.last)
+
+    def watch(self, loop: asyncio.AbstractEventLoop, thread_id: int) -> NoReturn:
+        """Runs in the watchdog thread, capturing the loop's stack once per stall"""
+
+        captured = None
+        while not self._stopped.wait(self.threshold / 4):
+            beat = self._beat
+            blocked = time.perf_counter() - beat - self.interval
+            if blocked < self.threshold or captured == beat:
+                continue
+
+            captured = beat
+            stall = Stall(time.time() - blocked, blocked, format_thread_stack(thread_id))
+            self.stalls.append(stall)
+            self.metrics.increment('loop_stalls_total')
+            try:
+                # the callback runs once the loop gets around to it, which is after the stall
+                loop.call_soon_threadsafe(self._report, stall)
+            except RuntimeError:
+                # the loop was closed
+                return
+
+    def _report(self, stall: Stall) -> NoReturn:
+        if self.on_stall:
+            self.on_stall(stall)
@@ -0,0 +1,266 @@
+import asyncio
+import collections
+import heapq
+import itertools
+import time
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    List,
+    NoReturn,
+    Optional
+)
+
+import discord
+
+import windiautils
+
+__all__ = ['Outbox', 'PRIORITY_MODERATION', 'PRIORITY_FAQ', 'PRIORITY_LOG']
+
+# lower values are sent first
+PRIORITY_MODERATION = 0
+PRIORITY_FAQ = 1
+PRIORITY_LOG = 2
+
+PRIORITY_NAMES = {PRIORITY_MODERATION: 'moderation', PRIORITY_FAQ: 'faq', PRIORITY_LOG: 'log'}
+
+OutboxStats = collections.namedtuple('OutboxStats', [
+    'channels', 'queued', 'queued_by_priority', 'sent', 'failed', 'dropped', 'merged', 'average_wait', 'max_wait'
+])
+
+
+class _Item:
+    __slots__ = ['priority', 'sequence', 'queued', 'stale_at', 'key', 'kwargs', 'futures']
+
+    def __init__(self, priority: int, sequence: int, stale_at: Optional[float], key: Optional[Hashable],
+                 kwargs: Dict[str, Any], future: asyncio.Future):
+        self.priority = priority
+        self.sequence = sequence
+        self.queued = time.monotonic()
+        self.stale_at = stale_at
+        self.key = key
+        self.kwargs = kwargs
+        # every caller whose send was merged into this item, each told the outcome
+        self.futures: List[asyncio.Future] = [future]
+
+    def __lt__(self, other: '_Item') -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+    @property
+    def abandoned(self) -> bool:
+        return all(future.done() for future in self.futures)
+
+    def resolve(self, result: Any = None, exception: Optional[BaseException] = None) -> NoReturn:
+        for future in self.futures:
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+    def cancel(self) -> NoReturn:
+        for future in self.futures:
+            future.cancel()
+
+
+async def resolve_channel(messageable: discord.abc.Messageable) -> discord.abc.Messageable:
+    """Returns the channel a messageable sends to, through public attributes only"""
+
+    if isinstance(messageable, discord.abc.User):
+        return messageable.dm_channel or await messageable.create_dm()
+    # a command context sends to its channel, and a channel to itself
+    return getattr(messageable, 'channel', messageable)
+
+
+class Outbox:
+    """A priority queue for every message the bot sends
+
+    Discord rate limits message sends per channel, and discord.py serializes
+    sends that hit a limited bucket in whatever order they arrive. The outbox
+    keeps one queue per channel with at most one send in flight, so while a
+    channel's bucket is exhausted the next send is picked by priority instead:
+    moderation responses before FAQ replies before log embeds. discord.py still
+    handles the 429 retries themselves.
+
+    Sends may be given a `stale_after`, after which an unsent item is dropped,
+    and a `key`, under which a newer send replaces a pending one in the same
+    channel. A full channel queue drops its lowest priority item.
+
+    Every cog and the Bot send through here: admin and FAQ management replies
+    as moderation, answers to users, error replies and help DMs as FAQ
+    replies, and `Bot.log` as logs. Only reactions are added directly, since
+    they are not messages.
+
+    Members
+    -------
+    max_queue: int
+        The number of items that may wait in one channel's queue
+
+    Methods
+    -------
+    async def send(messageable: discord.abc.Messageable[, priority: int = PRIORITY_FAQ, *,
+                   key: Hashable = None, stale_after: float = None, **kwargs]) -> Optional[discord.Message]
+        Queues a message and returns it once sent, or None if it was dropped
+
+    def stats() -> OutboxStats
+        Returns queue depths, send counters and queue wait times
+
+    def shutdown()
+        Abandons every queued message
+    """
+    __slots__ = ['max_queue', '_queues', '_keys', '_workers', '_sequence', '_counters', '_waits']
+
+    def __init__(self, max_queue: int = 64):
+        self.max_queue = max_queue
+        self._queues: Dict[int, List[_Item]] = dict()
+        self._keys: Dict[tuple, _Item] = dict()
+        self._workers: Dict[int, asyncio.Task] = dict()
+        self._sequence = itertools.count()
+        self._counters = collections.Counter()
+        self._waits = [0.0, 0, 0.0]  # total seconds, count, max seconds
+
+    async def send(self, messageable: discord.abc.Messageable, priority: int = PRIORITY_FAQ, *,
+                   key: Optional[Hashable] = None, stale_after: Optional[float] = None,
+                   **kwargs) -> Optional[discord.Message]:
+        """Queues a message and returns it once sent, or None if it was dropped
+
+        await send(messageable: discord.abc.Messageable[, priority: int = PRIORITY_FAQ, *,
+                   key: Hashable = None, stale_after: float = None, **kwargs])
+
+        This is a coroutine. The keyword arguments are passed on to
+        `messageable.send`. Cancelling the caller removes its message from the
+        queue if it has not been sent yet. A send merged into a pending one by
+        `key` replaces its content, moves it up if its priority is higher, and is
+        only removed once every caller merged into it is cancelled.
+
+        Parameters
+        ----------
+        messageable: discord.abc.Messageable
+            Where to send the message; members, users and contexts resolve to their channel
+
+        priority: int = PRIORITY_FAQ
+            One of PRIORITY_MODERATION, PRIORITY_FAQ or PRIORITY_LOG
+
+        key: Hashable = None
+            A pending message with the same key in the same channel is replaced by this one
+
+        stale_after: float = None
+            The number of seconds after which the message is dropped if still unsent
+
+        Raises
+        ------
+        discord.HTTPException
+            Sending the message failed
+        """
+
+        channel = await resolve_channel(messageable)
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        stale_at = time.monotonic() + stale_after if stale_after is not None else None
+
+        if key is not None and (pending := self._keys.get((channel.id, key))) and not pending.abandoned:
+            # the pending item keeps its place in the queue, unless this send outranks it, but sends the newer
+            # content; each caller waits on its own future, so either one may be cancelled without the other
+            self._counters['merged'] += 1
+            pending.kwargs = kwargs
+            pending.stale_at = stale_at
+            pending.futures.append(future)
+            if priority < pending.priority:
+                pending.priority = priority
+                heapq.heapify(self._queues[channel.id])
+            return await future
+
+        item = _Item(priority, next(self._sequence), stale_at, key, kwargs, future)
+        queue = self._queues.setdefault(channel.id, [])
+        heapq.heappush(queue, item)
+        if key is not None:
+            self._keys[(channel.id, key)] = item
+
+        if len(queue) > self.max_queue:
+            victim = max(queue)
+            queue.remove(victim)
+            heapq.heapify(queue)
+            self._drop(channel.id, victim)
+
+        if channel.id not in self._workers:
+            self._workers[channel.id] = loop.create_task(self._work(channel))
+
+        return await future
+
+    def _forget(self, channel_id: int, item: _Item):
+        if item.key is not None and self._keys.get((channel_id, item.key)) is item:
+            del self._keys[(channel_id, item.key)]
+
+    def _drop(self, channel_id: int, item: _Item):
+        self._forget(channel_id, item)
+        self._counters['dropped'] += 1
+        item.resolve(None)
+
+    async def _work(self, channel: discord.abc.Messageable):
+        queue = self._queues[channel.id]
+        try:
+            while queue:
+                item = heapq.heappop(queue)
+                if item.abandoned:
+                    # every caller was cancelled while the message was queued
+                    self._forget(channel.id, item)
+                    continue
+
+                now = time.monotonic()
+                if item.stale_at is not None and now > item.stale_at:
+                    self._drop(channel.id, item)
+                    continue
+
+                self._forget(channel.id, item)
+                wait = now - item.queued
+                self._waits[0] += wait
+                self._waits[1] += 1
+                self._waits[2] = max(self._waits[2], wait)
+
+                metrics = windiautils.Metrics.getInstance()
+                priority = PRIORITY_NAMES.get(item.priority, item.priority)
+                metrics.observe('send_wait_seconds', wait, priority=priority)
+                try:
+                    with metrics.time('send_seconds', priority=priority):
+                        message = await channel.send(**item.kwargs)
+                except asyncio.CancelledError:
+                    item.cancel()
+                    raise
+                except Exception as error:
+                    self._counters['failed'] += 1
+                    item.resolve(exception=error)
+                else:
+                    self._counters['sent'] += 1
+                    item.resolve(message)
+        finally:
+            del self._queues[channel.id]
+            del self._workers[channel.id]
+
+    def stats(self) -> OutboxStats:
+        # every priority is listed, so a drained queue reads 0 rather than the last depth reported for it
+        queued_by_priority = collections.Counter(dict.fromkeys(PRIORITY_NAMES.values(), 0))
+        queued_by_priority.update(
+            PRIORITY_NAMES.get(item.priority, item.priority) for queue in self._queues.values() for item in queue
+        )
+        total, count, longest = self._waits
+        return OutboxStats(
+            channels=len(self._queues),
+            queued=sum(queued_by_priority.values()),
+            queued_by_priority=dict(queued_by_priority),
+            sent=self._counters['sent'],
+            failed=self._counters['failed'],
+            dropped=self._counters['dropped'],
+            merged=self._counters['merged'],
+            average_wait=total / count if count else 0.0,
+            max_wait=longest
+        )
+
+    def shutdown(self) -> NoReturn:
+        for worker in list(self._workers.values()):
+            worker.cancel()
+        for queue in self._queues.values():
+            for item in queue:
+                item.cancel()
+        self._keys.clear()
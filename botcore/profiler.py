@@ -0,0 +1,154 @@
+import asyncio
+import collections
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import traceback
+from typing import (
+    Counter,
+    Optional,
+    Tuple
+)
+
+__all__ = ['PROFILE_MODES', 'ProfilerBusy', 'profile', 'format_thread_stack']
+
+PROFILE_MODES = ('sample', 'cprofile')
+SAMPLE_INTERVAL = 0.005
+REPORT_LIMIT = 40
+
+# leaf functions of a loop that is inside its selector rather than running a callback
+IDLE_FUNCTIONS = {'select', 'poll', '_poll'}
+
+_running = threading.Lock()
+
+Frame = Tuple[str, int, str]
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running"""
+
+
+def format_thread_stack(thread_id: int) -> str:
+    """Returns the current stack of a thread, innermost frame last, or an empty string if it has exited"""
+
+    if (frame := sys._current_frames().get(thread_id)) is None:
+        return ''
+    return ''.join(traceback.format_stack(frame))
+
+
+def _stack(thread_id: int) -> Optional[Tuple[Frame, ...]]:
+    if (frame := sys._current_frames().get(thread_id)) is None:
+        return None
+
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+def _sample(thread_id: int, seconds: float, interval: float) -> Counter[Tuple[Frame, ...]]:
+    stacks = collections.Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if stack := _stack(thread_id):
+            stacks[stack] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def _describe(frame: Frame) -> str:
+    filename, line, name = frame
+    return f'{name} ({filename}:{line})'
+
+
+def _sample_report(stacks: Counter[Tuple[Frame, ...]], seconds: float) -> str:
+    total = sum(stacks.values())
+    idle = sum(count for stack, count in stacks.items() if stack[-1][2] in IDLE_FUNCTIONS)
+    busy = {stack: count for stack, count in stacks.items() if stack[-1][2] not in IDLE_FUNCTIONS}
+
+    own = collections.Counter()
+    inclusive = collections.Counter()
+    for stack, count in busy.items():
+        own[(stack[-1][0], stack[-1][2])] += count
+        # a recursive function is only counted once per sample
+        for filename, name in {(filename, name) for filename, line, name in stack}:
+            inclusive[(filename, name)] += count
+
+    lines = [
+        f'{total} samples over {seconds:g}s of the event loop thread, '
+        f'{idle / total if total else 0:.1%} in the selector',
+        '',
+        f'{"own %":>7}  function',
+    ]
+    lines += [f'{count / total:>7.1%}  {name} ({filename})'
+              for (filename, name), count in own.most_common(REPORT_LIMIT)]
+    lines += ['', f'{"total %":>7}  function']
+    lines += [f'{count / total:>7.1%}  {name} ({filename})'
+              for (filename, name), count in inclusive.most_common(REPORT_LIMIT)]
+    lines += ['', 'Busiest stacks, outermost frame first', '']
+    for stack, count in sorted(busy.items(), key=lambda item: -item[1])[:REPORT_LIMIT // 4]:
+        lines.append(f'{count / total:.1%} of samples')
+        lines += [f'    {_describe(frame)}' for frame in stack]
+        lines.append('')
+    return '\n'.join(lines)
+
+
+async def _sample_loop(seconds: float) -> str:
+    thread_id = threading.get_ident()
+    stacks = await asyncio.get_event_loop().run_in_executor(None, _sample, thread_id, seconds, SAMPLE_INTERVAL)
+    return _sample_report(stacks, seconds)
+
+
+async def _profile_calls(seconds: float) -> str:
+    # cProfile only sees the thread it was enabled in, which here is the event loop's
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.sort_stats('cumulative').print_stats(REPORT_LIMIT)
+    stats.sort_stats('tottime').print_stats(REPORT_LIMIT)
+    return stream.getvalue()
+
+
+async def profile(mode: str, seconds: float) -> str:
+    """Profiles the event loop for a number of seconds and returns a text report
+
+    await profile(mode: str, seconds: float)
+
+    This is a coroutine. In 'sample' mode a thread records the loop thread's
+    stack every few milliseconds, which costs the loop almost nothing. The
+    sampler can only look while the loop thread lets go of the GIL, which it
+    does in its selector and at least every switch interval (5 ms), so long
+    callbacks are caught reliably but many short ones show up as selector
+    time. In 'cprofile' mode every call on the loop thread is traced, which is
+    exact but slows the bot down while it runs.
+
+    Raises
+    ------
+    ValueError
+        The mode is not one of PROFILE_MODES
+    ProfilerBusy
+        Another profile is already running
+    """
+
+    if mode not in PROFILE_MODES:
+        raise ValueError(f'Unknown profile mode {mode}')
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy('A profile is already running')
+
+    try:
+        if mode == 'sample':
+            return await _sample_loop(seconds)
+        return await _profile_calls(seconds)
+    finally:
+        _running.release()
@@ -1,9 +1,17 @@
+import datetime
+import io
+import math
 import os
+import time
 
+import discord
 from discord.ext import commands
 
 import botcore
 
+STATS_TOP = 8
+PROFILE_MAX_SECONDS = 120.0
+
 
 class Admin(commands.Cog):
     """A cog to do admin errands such as loading/unloading other cogs
@@ -27,6 +35,15 @@ class Admin(commands.Cog):
     async def unload_cog(self, ctx: commands.Context, cog: str):
         Attempts to unload a cog
 
+    async def stats_command(self, ctx: commands.Context):
+        Shows command and FAQ latencies, database and send timings, loop lag and queue state
+
+    async def profile_command(self, ctx: commands.Context[, seconds: float = 10.0, mode: str = 'sample']):
+        Profiles the event loop and uploads the report with the latest loop stalls
+
+    async def respond(ctx: commands.Context[, content: str = None, **kwargs]) -> discord.Message
+        Sends a response to an admin command ahead of other queued messages
+
     def cog_check(self, ctx: commands.Context):
         Checks if the user attempting to invoke any admin commands is the owner of the bot
     """
@@ -42,6 +59,16 @@ class Admin(commands.Cog):
 
         self.bot: botcore.Bot = bot
 
+    async def respond(self, ctx: commands.Context, content: str = None, **kwargs) -> discord.Message:
+        """Sends a response to an admin command ahead of other queued messages
+
+        await respond(ctx: commands.Context[, content: str = None, **kwargs])
+
+        This is a coroutine. The keyword arguments are passed on to the outbox.
+        """
+
+        return await self.bot.outbox.send(ctx, botcore.PRIORITY_MODERATION, content=content, **kwargs)
+
     @commands.command(
         name='reload',
         usage='`cog: str`',
@@ -53,15 +80,15 @@ class Admin(commands.Cog):
 
         try:
             self.bot.reload_extension(cog)
-            return await ctx.send(f'{cog} reloaded successfully.')
+            return await self.respond(ctx, f'{cog} reloaded successfully.')
         except commands.ExtensionNotLoaded:
-            return await ctx.send(f'{cog} not loaded.')
+            return await self.respond(ctx, f'{cog} not loaded.')
         except commands.ExtensionAlreadyLoaded:
-            return await ctx.send(f'{cog} is already loaded.')
+            return await self.respond(ctx, f'{cog} is already loaded.')
         except commands.ExtensionNotFound:
-            return await ctx.send(f'{cog} not found.')
+            return await self.respond(ctx, f'{cog} not found.')
         except commands.NoEntryPointError:
-            return await ctx.send(f'{cog} has no setup function.')
+            return await self.respond(ctx, f'{cog} has no setup function.')
 
     @commands.command(
         name='load',
@@ -74,13 +101,13 @@ class Admin(commands.Cog):
 
         try:
             self.bot.load_extension(cog)
-            return await ctx.send(f'{cog} loaded successfully.')
+            return await self.respond(ctx, f'{cog} loaded successfully.')
         except commands.ExtensionAlreadyLoaded:
-            return await ctx.send(f'{cog} is already loaded.')
+            return await self.respond(ctx, f'{cog} is already loaded.')
         except commands.ExtensionNotFound:
-            return await ctx.send(f'{cog} not found.')
+            return await self.respond(ctx, f'{cog} not found.')
         except commands.NoEntryPointError:
-            return await ctx.send(f'{cog} has no setup function.')
+            return await self.respond(ctx, f'{cog} has no setup function.')
 
     @commands.command(
         name='unload',
@@ -93,9 +120,92 @@ class Admin(commands.Cog):
 
         try:
             self.bot.unload_extension(cog)
-            return await ctx.send(f'{cog} unloaded successfully.')
+            return await self.respond(ctx, f'{cog} unloaded successfully.')
         except commands.ExtensionNotLoaded:
-            return await ctx.send(f'{cog} not loaded.')
+            return await self.respond(ctx, f'{cog} not loaded.')
+
+    @commands.command(
+        name='stats',
+        usage='',
+        description='Shows latency and queue statistics',
+        hidden=True
+    )
+    async def stats_command(self, ctx: commands.Context):
+        metrics = self.bot.metrics
+        metrics.collect()
+
+        def table(title: str, name: str, label: str, limit: int = STATS_TOP) -> list:
+            series = sorted(metrics.histograms(name).items(), key=lambda item: -item[1].count)[:limit]
+            lines = [f'{title:<24}{"count":>8}{"p50 ms":>10}{"p99 ms":>10}']
+            for labels, histogram in series:
+                key = ' '.join(str(value) for key, value in labels if key == label or not label) or 'all'
+                lines.append(f'{key[:24]:<24}{histogram.count:>8}'
+                             f'{histogram.quantile(0.5) * 1e3:>10.2f}{histogram.quantile(0.99) * 1e3:>10.2f}')
+            return lines + ['']
+
+        def gauge(name: str) -> float:
+            return next(iter(metrics.gauges(name).values()), 0)
+
+        uptime = int(time.time() - metrics.started)
+        lines = [
+            f'Uptime {uptime // 3600}h {uptime % 3600 // 60:02}m, '
+            f'gateway {gauge("gateway_latency_seconds") * 1e3:.0f} ms, '
+            f'loop lag now {gauge("loop_lag_last_seconds") * 1e3:.1f} ms',
+            '',
+            *table('Commands', 'command_seconds', 'command'),
+            *table('FAQ', 'faq_seconds', 'faq'),
+            *table('Loop lag', 'loop_lag_seconds', ''),
+            *table('Database queries', 'faq_query_seconds', 'query'),
+            *table('Fuzzy matches', 'fuzzy_match_seconds', ''),
+            *table('Sends', 'send_seconds', 'priority'),
+            *table('Send queue waits', 'send_wait_seconds', 'priority'),
+            f'Compute: {gauge("compute_running"):.0f} running, {gauge("compute_queued"):.0f} queued, '
+            f'{gauge("compute_rejected"):.0f} rejected, {gauge("compute_timed_out"):.0f} timed out',
+            f'Outbox: {gauge("outbox_queued"):.0f} queued, {gauge("outbox_sent"):.0f} sent, '
+            f'{gauge("outbox_dropped"):.0f} dropped, {gauge("outbox_merged"):.0f} merged',
+            f'FAQ cache: {gauge("faq_cache_hits"):.0f} hits, {gauge("faq_cache_misses"):.0f} misses, '
+            f'{gauge("faq_cache_negative_hits"):.0f} negative hits',
+            f'Loop stalls: {sum(metrics.counters("loop_stalls_total").values()):.0f}',
+        ]
+
+        return await self.respond(ctx, '```' + '\n'.join(lines)[:1990] + '```')
+
+    @commands.command(
+        name='profile',
+        usage='`seconds: float` `mode: sample|cprofile`',
+        description='Profiles the bot and uploads the report',
+        hidden=True
+    )
+    async def profile_command(self, ctx: commands.Context, seconds: float = 10.0, mode: str = 'sample'):
+        """Profiles the event loop and uploads the report with the latest loop stalls
+
+        await profile_command(ctx: commands.Context[, seconds: float = 10.0, mode: str = 'sample'])
+
+        This is a coroutine. 'sample' mode records the loop's stack from another
+        thread and barely slows the bot down; 'cprofile' mode traces every call
+        and is exact but slow. Sessions are capped at PROFILE_MAX_SECONDS.
+        """
+
+        if mode not in botcore.PROFILE_MODES:
+            return await self.respond(ctx, f'Unknown mode {mode}, use one of {", ".join(botcore.PROFILE_MODES)}.')
+
+        if not math.isfinite(seconds):
+            return await self.respond(ctx, f'Give the number of seconds from 1 to {PROFILE_MAX_SECONDS:g}, e.g. 10.')
+        seconds = min(max(seconds, 1.0), PROFILE_MAX_SECONDS)
+        await self.respond(ctx, f'Profiling for {seconds:g} seconds in {mode} mode.')
+        try:
+            report = await botcore.profile(mode, seconds)
+        except botcore.ProfilerBusy as error:
+            return await self.respond(ctx, f'{error}.')
+
+        stalls = [f'Loop stalls over {self.bot.lag_monitor.threshold * 1000:.0f} ms, latest last', '']
+        for stall in self.bot.lag_monitor.stalls:
+            started = datetime.datetime.utcfromtimestamp(stall.started).strftime('%Y-%m-%d %H:%M:%S')
+            stalls += [f'{started} UTC, blocked for at least {stall.blocked * 1000:.0f} ms', stall.stack]
+
+        report = '\n'.join((report, '', *stalls))
+        filename = f'profile-{mode}-{datetime.datetime.utcnow():%Y%m%d-%H%M%S}.txt'
+        return await self.respond(ctx, file=discord.File(io.BytesIO(report.encode()), filename=filename))
 
     def cog_check(self, ctx: commands.Context):
         """Checks if the user attempting to invoke any admin commands is the owner of the bot
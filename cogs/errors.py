@@ -1,5 +1,6 @@
 from discord.ext import commands
 from botcore import Bot
+import botcore
 import sys
 import traceback
 
@@ -10,54 +11,75 @@ class ErrorsCog(commands.Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
 
+    async def respond(self, ctx: commands.Context, content: str):
+        """Tells the user why their command failed, queued like any other reply to a user
+
+        await respond(ctx: commands.Context, content: str)
+
+        This is a coroutine.
+        """
+
+        return await self.bot.outbox.send(ctx, botcore.PRIORITY_FAQ, content=content)
+
     @commands.Cog.listener('on_command_error')
     async def log_command_errors(self, ctx: commands.Context, error: commands.CommandError):
         if isinstance(error, commands.UserInputError):
-            return await ctx.send(
+            return await self.respond(
+                ctx,
                 f'**ERROR** {ctx.author.mention}, please follow the command\'s proper usage: '
                 f'{self.bot.command_prefix}{ctx.invoked_with} {ctx.command.usage}'
             )
         elif isinstance(error, commands.CheckFailure):
             if isinstance(error, commands.BotMissingPermissions):
-                return await ctx.send(
+                return await self.respond(
+                    ctx,
                     f'**ERROR** I lack permissions to use this command. I need `{error.missing_perms}`.'
                 )
             elif isinstance(error, commands.BotMissingRole):
-                return await ctx.send(
+                return await self.respond(
+                    ctx,
                     f'**ERROR** I lack the role to use this command. I need `{error.missing_role}`.'
                 )
             elif isinstance(error, commands.BotMissingAnyRole):
-                return await ctx.send(
+                return await self.respond(
+                    ctx,
                     f'**ERROR** I lack a role to use this command. I need one of any `{error.missing_roles}`.'
                 )
             else:
-                return await ctx.send(
+                return await self.respond(
+                    ctx,
                     f'**ERROR** {ctx.author.mention}, you lack permission to use this command.'
                 )
         elif isinstance(error, commands.PrivateMessageOnly):
-            return await ctx.send(
+            return await self.respond(
+                ctx,
                 f'**ERROR** {ctx.author.mention}, this command may only be used in DMs.'
             )
         elif isinstance(error, commands.NoPrivateMessage):
-            return await ctx.send(
+            return await self.respond(
+                ctx,
                 f'**ERROR** {ctx.author.mention}, this command may not be used in DMs.'
             )
         elif isinstance(error, commands.DisabledCommand):
-            return await ctx.send(
+            return await self.respond(
+                ctx,
                 f'**ERROR** {ctx.author.mention}, this command has been disabled.'
             )
         elif isinstance(error, commands.CommandOnCooldown):
-            return await ctx.send(
+            return await self.respond(
+                ctx,
                 f'**ERROR** {ctx.author.mention}, you are on cooldown for {error.retry_after} seconds.'
             )
         elif isinstance(error, commands.CommandNotFound):
             pass
         elif isinstance(error, commands.DisabledCommand):
-            return await ctx.send(
+            return await self.respond(
+                ctx,
                 f'**ERROR** {ctx.author.mention}, this command has been disabled.'
             )
         elif isinstance(error, commands.ConversionError):
-            return await ctx.send(
+            return await self.respond(
+                ctx,
                 f'**ERROR** {ctx.author.mention}, {error.converter} failed!'
             )
         else:
@@ -70,7 +92,8 @@ class ErrorsCog(commands.Cog):
                 ('Error Message', "".join(traceback.format_exception(etype, error, etb, 4)))
             )
 
-            return await ctx.send(
+            return await self.respond(
+                ctx,
                 f'**ERROR** An unknown or unhandled error has occurred processing this command. {self.bot.owner_id}'
             )
 
@@ -1,9 +1,28 @@
+import asyncio
+import collections
+import io
+import math
+import time
+from typing import Optional
+
 import discord
 from discord.ext import commands
 
 import botcore
 import windiautils
 
+RECENT_REPLY_CACHE_SIZE = 1024
+RECENT_REPLY_CACHE_TTL = 24 * 60 * 60.0
+COALESCED_REACTION = '\N{UPWARDS BLACK ARROW}\N{VARIATION SELECTOR-16}'
+FAQ_STALE_AFTER = 60.0
+IMPORT_OPTIONS = ('merge', 'replace', 'dry-run')
+IMPORT_MAX_BYTES = 4 * 1024 * 1024
+AUTO_ANSWER_THRESHOLD = 0.4
+AUTO_ANSWER_COOLDOWN = 120.0
+AUTO_ANSWER_BUDGET_US = 250
+TOP_DAYS = 7.0
+TOP_MAX_DAYS = 365.0
+
 
 class FAQ(commands.Cog):
     """A cog used for the Windia FAQ and managing the Windia FAQ
@@ -13,8 +32,17 @@ class FAQ(commands.Cog):
     bot: botcore.Bot
         The Discord Bot that the Cog is loaded into
 
-    faq_commands: dict
-        A dictionary of frequently asked questions and their descriptions
+    recent_replies: windiautils.TTLCache
+        The time and pending or sent reply of the last answer per channel and FAQ command
+
+    coalesce_stats: collections.Counter
+        How many FAQ replies were sent and how many were coalesced into a recent one
+
+    keyword_index: Optional[windiautils.KeywordIndex]
+        The index plain chat messages are matched against, rebuilt in the background after FAQ changes
+
+    auto_answered: dict
+        When each channel last got an automatic answer
     
     Methods
     -------
@@ -27,11 +55,42 @@ class FAQ(commands.Cog):
     async def remove_command(ctx: discord.ext.commands.Context[, command: str = None])
         Attempts to remove an existing FAQ command
 
+    async def import_command(ctx: discord.ext.commands.Context, *options: str)
+        Adds and updates FAQ commands from an attached JSON or CSV file
+
+    async def export_command(ctx: discord.ext.commands.Context[, file_format: str = 'json'])
+        Uploads every FAQ command as a JSON or CSV file
+
+    async def top_command(ctx: discord.ext.commands.Context[, days: float = 7.0])
+        Lists the most used FAQ commands and the channels they were used in
+
     def cog_check(ctx: commands.Context)
         Checks if the user attempting to invoke an admin command has the manage_message permission
 
-    async def faq_check(self, message: discord.Message)
-        Check if the user is trying to invoke an faq_command
+    async def faq_check(self, message: discord.Message, command: str)
+        Responds to a FAQ command or suggests the nearest FAQ commands
+
+    async def answer(message: discord.Message, command: str)
+        Sends the FAQ answer or suggestion for a FAQ message, timed by faq_check
+
+    async def auto_answer(message: discord.Message)
+        Answers a chat message with the FAQ it asks about, if enabled and confident enough
+
+    def refresh_keyword_index() -> Optional[asyncio.Task]
+        Starts rebuilding the keyword index in the background if the FAQ commands changed
+
+    async def get_keyword_index() -> Optional[windiautils.KeywordIndex]
+        Returns the keyword index, waiting for it to be rebuilt if the FAQ commands changed
+
+    async def send_coalesced(message: discord.Message, command: str, template: windiautils.EmbedTemplate)
+        Sends a FAQ reply unless the same FAQ was answered in the channel moments ago
+
+    async def send_faq(messageable: discord.abc.Messageable, template: windiautils.EmbedTemplate,
+                       author: discord.Member) -> Optional[discord.Message]
+        Queues a FAQ reply behind moderation responses, dropping it if it waits too long
+
+    async def respond(ctx: discord.ext.commands.Context, content: str) -> discord.Message
+        Sends a response to a FAQ management command ahead of other queued messages
     """
 
     def __init__(self, bot: botcore.Bot):
@@ -42,11 +101,113 @@ class FAQ(commands.Cog):
         bot: botcore.Bot
             The Discord Bot that the Cog is loaded into
 
-        faq_commands: dict
-            A dictionary of frequently asked questions and their descriptions
+        recent_replies: windiautils.TTLCache
+            The time and pending or sent reply of the last answer per channel and FAQ command
+
+        coalesce_stats: collections.Counter
+            How many FAQ replies were sent and how many were coalesced into a recent one
+
+        keyword_index: Optional[windiautils.KeywordIndex]
+            The index plain chat messages are matched against, rebuilt in the background after FAQ changes
+
+        auto_answered: dict
+            When each channel last got an automatic answer
         """
 
         self.bot: botcore.Bot = bot
+        self.recent_replies = windiautils.TTLCache(maxsize=RECENT_REPLY_CACHE_SIZE, ttl=RECENT_REPLY_CACHE_TTL)
+        self.coalesce_stats = collections.Counter()
+        self.keyword_index: Optional[windiautils.KeywordIndex] = None
+        self._keyword_generation = None
+        self._keyword_rebuild: Optional[asyncio.Task] = None
+        self.auto_answered = dict()
+
+    def cog_unload(self):
+        if self._keyword_rebuild is not None:
+            self._keyword_rebuild.cancel()
+
+    async def send_coalesced(self, message: discord.Message, command: str, template: windiautils.EmbedTemplate):
+        """Sends a FAQ reply unless the same FAQ was answered in the channel moments ago
+
+        await send_coalesced(message: discord.Message, command: str, template: windiautils.EmbedTemplate)
+
+        This is a coroutine. When the FAQ command (or any alias of it) was answered
+        in the same channel within the last `Bot/CoalesceWindow` seconds, the
+        message is reacted to instead, pointing the user at the answer above.
+        If the reaction cannot be added, a short reply linking the answer is sent.
+        A window of 0 disables coalescing.
+
+        Parameters
+        ----------
+        message: discord.Message
+            The message that triggered the FAQ command
+
+        command: str
+            The FAQ command or suggestion token that was triggered
+
+        template: windiautils.EmbedTemplate
+            The rendered answer
+        """
+
+        window = float(self.bot.config.get('Bot', 'CoalesceWindow', windiautils.COALESCE_WINDOW))
+        key = (message.channel.id, windiautils.resolve_command(command) or command)
+
+        if window > 0 and (recent := self.recent_replies.get(key)) and time.monotonic() - recent[0] < window:
+            self.coalesce_stats['coalesced'] += 1
+            self.bot.metrics.increment('faq_replies_total', outcome='coalesced')
+            try:
+                return await message.add_reaction(COALESCED_REACTION)
+            except discord.HTTPException:
+                if reply := await asyncio.shield(recent[1]):
+                    return await self.bot.outbox.send(
+                        message.channel,
+                        botcore.PRIORITY_FAQ,
+                        stale_after=float(self.bot.config.get('Outbox', 'FAQStaleAfter', FAQ_STALE_AFTER)),
+                        content=f'{message.author.mention}, this was answered just above: {reply.jump_url}'
+                    )
+
+        # the pending send is cached so triggers arriving before it completes are coalesced too
+        reply = asyncio.ensure_future(self.send_faq(message.channel, template, message.author))
+        self.recent_replies.set(key, (time.monotonic(), reply))
+        self.coalesce_stats['sent'] += 1
+        self.bot.metrics.increment('faq_replies_total', outcome='sent')
+        try:
+            if result := await reply:
+                return result
+        except Exception:
+            self.recent_replies.discard(key)
+            raise
+
+        # the reply went stale in the outbox, so there is nothing to point the next trigger at
+        self.recent_replies.discard(key)
+
+    async def send_faq(self, messageable: discord.abc.Messageable, template: windiautils.EmbedTemplate,
+                       author: discord.Member) -> Optional[discord.Message]:
+        """Queues a FAQ reply behind moderation responses, dropping it if it waits too long
+
+        await send_faq(messageable: discord.abc.Messageable, template: windiautils.EmbedTemplate,
+                       author: discord.Member)
+
+        This is a coroutine. Returns None when the reply waited in the outbox
+        longer than `Outbox/FAQStaleAfter` seconds and was dropped.
+        """
+
+        return await self.bot.outbox.send(
+            messageable,
+            botcore.PRIORITY_FAQ,
+            stale_after=float(self.bot.config.get('Outbox', 'FAQStaleAfter', FAQ_STALE_AFTER)),
+            embed=windiautils.render_template(template, author)
+        )
+
+    async def respond(self, ctx: commands.Context, content: str) -> discord.Message:
+        """Sends a response to a FAQ management command ahead of other queued messages
+
+        await respond(ctx: discord.ext.commands.Context, content: str)
+
+        This is a coroutine.
+        """
+
+        return await self.bot.outbox.send(ctx, botcore.PRIORITY_MODERATION, content=content)
 
     @commands.command(
         name='add',
@@ -76,9 +237,9 @@ class FAQ(commands.Cog):
         """
 
         if await windiautils.create_command(command.lower(), description):
-            return await ctx.send(f'{command} was added successfully.')
+            return await self.respond(ctx, f'{command} was added successfully.')
         else:
-            return await ctx.send(f'{command} already exists.')
+            return await self.respond(ctx, f'{command} already exists.')
 
 
     @commands.command(
@@ -109,9 +270,9 @@ class FAQ(commands.Cog):
         """
 
         if await windiautils.update_command(command.lower(), description):
-            return await ctx.send(f'{command} was updated successfully.')
+            return await self.respond(ctx, f'{command} was updated successfully.')
         else:
-            return await ctx.send(f'{command} does not exist.')
+            return await self.respond(ctx, f'{command} does not exist.')
 
     @commands.command(
         name='alias',
@@ -126,7 +287,8 @@ class FAQ(commands.Cog):
 
         This is a coroutine. This is not called directly; it is called whenever
         the Bot receives the command `$alias` from a user. This command attempts
-        to alias the given FAQ command with the given alias.
+        to alias the given FAQ command with the given alias. The alias refers to
+        the command rather than copying it, so updating the command updates it too.
 
         Parameters
         ----------
@@ -140,15 +302,14 @@ class FAQ(commands.Cog):
             The new alias for the given FAQ command
         """
 
-        if (existing := await windiautils.get_command(command.lower())) and not windiautils.get_command(alias.lower()):
-            await windiautils.create_command(alias.lower(), existing)
-            return await ctx.send(f'The alias {alias} has been added to {command}.')
+        if await windiautils.create_alias(alias.lower(), command.lower()):
+            return await self.respond(ctx, f'The alias {alias} has been added to {command}.')
 
         else:
-            if not existing:
-                return await ctx.send(f'{command} is not a command.')
+            if not windiautils.resolve_command(command.lower()):
+                return await self.respond(ctx, f'{command} is not a command.')
             else:
-                return await ctx.send(f'{alias} is already a command.')
+                return await self.respond(ctx, f'{alias} is already a command.')
 
     @commands.command(
         name='remove',
@@ -175,9 +336,139 @@ class FAQ(commands.Cog):
         """
 
         if await windiautils.delete_command(command.lower()):
-            return await ctx.send(f'{command} was removed.')
+            return await self.respond(ctx, f'{command} was removed.')
         else:
-            return await ctx.send(f'{command} is not a command.')
+            return await self.respond(ctx, f'{command} is not a command.')
+
+    @commands.command(
+        name='import',
+        description='Adds and updates FAQ commands from an attached JSON or CSV file',
+        usage='`mode: merge|replace` `dry-run`',
+        hidden=True
+    )
+    async def import_command(self, ctx: commands.Context, *options: str):
+        """Adds and updates FAQ commands from an attached JSON or CSV file
+
+        await import_command(ctx: commands.context, *options: str)
+
+        This is a coroutine. This is not called directly; it is called whenever
+        the Bot receives the command `$import` from a user. The attached file is
+        validated as a whole and then applied in a single transaction: 'merge'
+        (the default) adds new commands and updates changed ones, 'replace' also
+        removes every command missing from the file and 'dry-run' only reports
+        what would change.
+
+        Parameters
+        ----------
+        ctx: discord.ext.commands.Context
+            The context of the message sent by the user
+
+        options: str
+            Any of 'merge', 'replace' and 'dry-run'
+        """
+
+        options = {option.lower() for option in options}
+        if unknown := options.difference(IMPORT_OPTIONS):
+            return await self.respond(
+                ctx, f'Unknown option {", ".join(sorted(unknown))}, use any of {", ".join(IMPORT_OPTIONS)}.'
+            )
+        if not ctx.message.attachments:
+            return await self.respond(ctx, 'Attach a JSON or CSV file of FAQ commands to import.')
+
+        attachment = ctx.message.attachments[0]
+        if attachment.size > IMPORT_MAX_BYTES:
+            return await self.respond(ctx, f'{attachment.filename} is larger than {IMPORT_MAX_BYTES // 1024} KiB.')
+
+        try:
+            text = (await attachment.read()).decode('utf-8-sig')
+            entries = windiautils.read_entries(
+                io.StringIO(text, newline=''), windiautils.guess_format(attachment.filename)
+            )
+        except UnicodeDecodeError:
+            return await self.respond(ctx, f'{attachment.filename} was not imported, it is not UTF-8 text.')
+        except windiautils.FAQFileError as error:
+            return await self.respond(ctx, f'{attachment.filename} was not imported: {error}'[:2000])
+
+        dry_run = 'dry-run' in options
+        result = await windiautils.import_commands(entries, replace='replace' in options, dry_run=dry_run)
+        return await self.respond(ctx, windiautils.describe_import(result, dry_run)[:2000])
+
+    @commands.command(
+        name='export',
+        description='Uploads every FAQ command as a JSON or CSV file',
+        usage='`format: json|csv`',
+        hidden=True
+    )
+    async def export_command(self, ctx: commands.Context, file_format: str = 'json'):
+        """Uploads every FAQ command as a JSON or CSV file
+
+        await export_command(ctx: commands.context[, file_format: str = 'json'])
+
+        This is a coroutine. This is not called directly; it is called whenever
+        the Bot receives the command `$export` from a user. The file can be
+        given back to `$import` as it is.
+
+        Parameters
+        ----------
+        ctx: discord.ext.commands.Context
+            The context of the message sent by the user
+
+        file_format: str = 'json'
+            Either 'json' or 'csv'
+        """
+
+        file_format = file_format.lower()
+        if file_format not in windiautils.FAQ_FILE_FORMATS:
+            return await self.respond(
+                ctx, f'Unknown format {file_format}, use one of {", ".join(windiautils.FAQ_FILE_FORMATS)}.'
+            )
+
+        stream = io.StringIO(newline='')
+        windiautils.write_entries(await windiautils.export_commands(), stream, file_format)
+        file = discord.File(io.BytesIO(stream.getvalue().encode()), filename=f'commands.{file_format}')
+        return await self.bot.outbox.send(ctx, botcore.PRIORITY_MODERATION, file=file)
+
+    @commands.command(
+        name='top',
+        description='Lists the most used FAQ commands',
+        usage='`days: number`',
+        hidden=True
+    )
+    async def top_command(self, ctx: commands.Context, days: float = TOP_DAYS):
+        """Lists the most used FAQ commands and the channels they were used in
+
+        await top_command(ctx: commands.context[, days: float = 7.0])
+
+        This is a coroutine. This is not called directly; it is called whenever
+        the Bot receives the command `$top` from a user. Uses are counted per
+        hour, so the report covers the last `days` days to the hour.
+
+        Parameters
+        ----------
+        ctx: discord.ext.commands.Context
+            The context of the message sent by the user
+
+        days: float = 7.0
+            How many days back to count, from 1 to TOP_MAX_DAYS
+        """
+
+        if not math.isfinite(days):
+            return await self.respond(ctx, f'Give the number of days from 1 to {TOP_MAX_DAYS:g}, e.g. 7.')
+        days = min(max(days, 1.0), TOP_MAX_DAYS)
+        report = await self.bot.usage.top(days)
+        if not report.total:
+            return await self.respond(ctx, f'No FAQ commands were used in the last {days:g} days.')
+
+        lines = [f'**Most used FAQ commands in the last {days:g} days** ({report.total} uses)']
+        lines += [
+            f'{rank}. `{self.bot.command_prefix}{command}` {uses} ({uses / report.total:.0%})'
+            for rank, (command, uses) in enumerate(report.commands, start=1)
+        ]
+        channels = ', '.join(
+            f'<#{channel}> {uses}' if channel else f'DMs {uses}' for channel, uses in report.channels
+        )
+        lines += ['', f'**Channels** {channels}']
+        return await self.respond(ctx, '\n'.join(lines)[:2000])
 
     async def cog_before_invoke(self, ctx):
         """"""
@@ -189,7 +480,7 @@ class FAQ(commands.Cog):
         """Checks if the user attempting to invoke an admin command has the manage_message permission
 
         Checks if the author has manage messages permission, which is enough to invoke
-        the CRUD commands for FAQ commands
+        the CRUD commands for FAQ commands. The answer is cached by the bot's AccessCache.
 
         Parameters
         ----------
@@ -197,56 +488,191 @@ class FAQ(commands.Cog):
             The context of the message sent by the user received by the bot
         """
 
-        return ctx.channel.permissions_for(ctx.author).manage_messages
+        return self.bot.access.resolve(ctx.channel, ctx.author).moderator
 
-    @commands.Cog.listener('on_message')
-    async def faq_check(self, message: discord.Message):
-        """Check if the user is trying to invoke an faq_command
+    @commands.Cog.listener('on_faq')
+    @commands.Cog.listener('on_faq_miss')
+    async def faq_check(self, message: discord.Message, command: str):
+        """Responds to a FAQ command or suggests the nearest FAQ commands
 
-        FAQ commands are not handled like normal commands; rather they are
-        just manually parsed through the message's content by checking
-        if the message starts with the bot's command prefix and followed
-        by a FAQ command name.
+        FAQ commands are not handled like normal commands; the Bot parses the
+        first word after the prefix once and fires `on_faq` when it is a FAQ
+        command name, or `on_faq_miss` when it is neither a FAQ command nor a
+        bot command, in which case the nearest FAQ commands are suggested.
 
         Parameters
         ----------
         message: discord.Message
-            The message object sent by the user to parse for a FAQ command
-        """
-
-        if message.content.startswith(self.bot.command_prefix):
-            raw_command = message.content.lower()[1::].split(' ')
-            command = raw_command[0]
-            if self.bot.get_command(command):
-                # this means it's a bot command, not a faq command
-                return
-
-            channel = message.channel
-            guild = message.guild
-            author = message.author
-
-            if (output := await windiautils.get_command(command.lower())) and await windiautils.database_exists():
-                if not guild:
-                    # means the command was invoked in a DM channel
-                    return await windiautils.send_embed(
-                        title=command,
-                        description=output,
-                        messageable=author,
-                        author=author
-                    )
+            The message object sent by the user
+
+        command: str
+            The lowercased first word of the message after the prefix
+        """
+
+        start = time.perf_counter()
+        faq = windiautils.resolve_command(command)
+        try:
+            result = await self.answer(message, command)
+        finally:
+            # misses are not labelled with the token so typos cannot create new series
+            self.bot.metrics.observe('faq_seconds', time.perf_counter() - start, faq=faq or '(miss)')
+
+        if faq:
+            # counted in memory; Usage writes the counts in batches off this path
+            self.bot.usage.record(faq, message.channel.id if message.guild else 0)
+        return result
+
+    async def answer(self, message: discord.Message, command: str):
+        """Sends the FAQ answer or suggestion for a FAQ message, timed by faq_check
+
+        await answer(message: discord.Message, command: str)
+
+        This is a coroutine.
+
+        Raises
+        ------
+        discord.ext.commands.CheckFailure
+            A non-moderator used a FAQ command outside of the bot channel
+        """
+
+        channel = message.channel
+        guild = message.guild
+        author = message.author
+
+        if (output := await windiautils.get_command(command)) and await windiautils.database_exists():
+            if (template := windiautils.get_template(command)) is None:
+                # a suggestion for a typo, which has no template of its own
+                template = windiautils.compile_embed(title=command, description=output)
+
+            if not guild:
+                # means the command was invoked in a DM channel
+                return await self.send_faq(author, template, author)
+
+            if not self.bot.access.resolve(channel, author).faq_allowed:
+                # the command was attempted to be invoked by a non-mod in some channel besides the bot channel
+                raise commands.CheckFailure(message='You do not have permission to invoke the FAQ command here.')
+
+            return await self.send_coalesced(message, command, template)
+
+    def refresh_keyword_index(self) -> Optional[asyncio.Task]:
+        """Starts rebuilding the keyword index in the background if the FAQ commands changed
+
+        Every name of a FAQ command, aliases included, and its description go
+        into the index. The index is built in the bot's compute pool, since at
+        thousands of FAQs building it takes about a second of pure Python, and
+        at most one rebuild runs at a time; until it finishes, keyword_index
+        keeps the previous index, or None before the first one is built.
+
+        Returns
+        -------
+        Optional[asyncio.Task]
+            The rebuild in progress, or None if the index is up to date
+        """
+
+        if self._keyword_rebuild is None and (
+                self.keyword_index is None or self._keyword_generation != windiautils.generation()):
+            self._keyword_rebuild = asyncio.ensure_future(self._rebuild_keyword_index())
+        return self._keyword_rebuild
+
+    async def _rebuild_keyword_index(self):
+        try:
+            generation = windiautils.generation()
+            descriptions = await windiautils.export_commands()
+            names = collections.defaultdict(list)
+            for name in windiautils.command_names():
+                names[windiautils.resolve_command(name)].append(name)
+
+            self.keyword_index = await self.bot.compute.run(
+                windiautils.KeywordIndex,
+                {command: (names[command], description) for command, description in descriptions.items()}
+            )
+            self._keyword_generation = generation
+        except Exception as error:
+            # nobody awaits a background rebuild, so the error is reported here; the previous index stays in use
+            # and the next chat message tries again
+            print(f'Could not rebuild the keyword index: {error}')
+        finally:
+            self._keyword_rebuild = None
+
+    async def get_keyword_index(self) -> Optional[windiautils.KeywordIndex]:
+        """Returns the keyword index, waiting for it to be rebuilt if the FAQ commands changed
+
+        await get_keyword_index()
+
+        This is a coroutine. It waits for the rebuild started by
+        refresh_keyword_index, so it suits warming the index up rather than
+        answering messages; if the rebuild fails, the previous index, or None,
+        is returned.
+        """
+
+        if rebuild := self.refresh_keyword_index():
+            await asyncio.shield(rebuild)
+        return self.keyword_index
+
+    @commands.Cog.listener('on_chat')
+    async def auto_answer(self, message: discord.Message):
+        """Answers a chat message with the FAQ it asks about, if enabled and confident enough
+
+        await auto_answer(message: discord.Message)
+
+        This is a coroutine. This is not called directly; it is fired for every
+        guild message without the command prefix, and does nothing unless
+        `AutoAnswer/Enabled` is set. The message is matched against the current
+        keyword index, never waiting for a rebuild, within
+        `AutoAnswer/BudgetMicroseconds`, and the best FAQ is sent if
+        it scores at least `AutoAnswer/Threshold`. A channel that got an answer
+        is not scanned again for `AutoAnswer/Cooldown` seconds. Only channels in
+        which the author may use FAQ commands are answered in, which for members
+        is the bot channel, and messages of moderators are never answered.
+
+        Parameters
+        ----------
+        message: discord.Message
+            The message object sent by the user
+        """
 
-                bot_channel_id = await self.bot.config.aiogetint('Bot', 'Channel')
-                if bot_channel := guild.get_channel(bot_channel_id):
-                    if not any((channel.id == bot_channel.id, bot_channel.permissions_for(author).manage_messages)):
-                        # the command was attempted to be invoked by a non-mod in some channel besides the bot channel
-                        raise commands.CheckFailure(message='You do not have permission to invoke the FAQ command here.')
-
-                return await windiautils.send_embed(
-                    title=command,
-                    description=output,
-                    messageable=channel,
-                    author=author
-                )
+        config = self.bot.config
+        if not message.guild or not config.getint('AutoAnswer', 'Enabled', 0):
+            return
+
+        access = self.bot.access.resolve(message.channel, message.author)
+        if access.moderator or not access.faq_allowed:
+            # the same restriction as typed FAQ commands, so answers only appear where members may ask for them
+            return
+
+        now = time.monotonic()
+        cooldown = float(config.get('AutoAnswer', 'Cooldown', AUTO_ANSWER_COOLDOWN))
+        if now - self.auto_answered.get(message.channel.id, -math.inf) < cooldown:
+            return
+
+        # a rebuild takes long enough that the message is matched against the index at hand instead of waiting
+        self.refresh_keyword_index()
+        if (index := self.keyword_index) is None:
+            return
+        threshold = float(config.get('AutoAnswer', 'Threshold', AUTO_ANSWER_THRESHOLD))
+        budget = int(config.get('AutoAnswer', 'BudgetMicroseconds', AUTO_ANSWER_BUDGET_US)) * 1000
+        start = time.perf_counter_ns()
+        match = index.match(message.content, threshold, budget)
+        elapsed = time.perf_counter_ns() - start
+        self.bot.metrics.observe('auto_answer_seconds', elapsed / 1e9)
+
+        if match is None:
+            outcome = 'over_budget' if elapsed > budget else 'no_match'
+            return self.bot.metrics.increment('auto_answers_total', outcome=outcome)
+        if (template := windiautils.get_template(match.command)) is None:
+            # deleted since the index was built
+            return self.bot.metrics.increment('auto_answers_total', outcome='no_match')
+
+        self.auto_answered[message.channel.id] = now
+        self.bot.metrics.increment('auto_answers_total', outcome='answered')
+        return await self.bot.outbox.send(
+            message.channel,
+            botcore.PRIORITY_FAQ,
+            stale_after=float(config.get('Outbox', 'FAQStaleAfter', FAQ_STALE_AFTER)),
+            content=f'{message.author.mention}, this might answer your question. '
+                    f'Next time, try `{self.bot.command_prefix}{match.command}`.',
+            embed=windiautils.render_template(template, message.author)
+        )
 
 
 def setup(bot):
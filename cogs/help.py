@@ -1,3 +1,5 @@
+from typing import List
+
 import discord
 from discord.ext import commands
 
@@ -12,11 +14,17 @@ class Help(commands.Cog):
     -------
     bot: botcore.Bot
         The Discord Bot that the Cog is loaded into
+
+    pages: dict
+        The rendered help pages for moderators and for everyone else
     
     Methods
     -------
     async def help_command(ctx: discord.ext.commands.Context)
         DMs the user invoking the command the list of commands
+
+    def get_pages(moderator: bool) -> List[str]
+        Returns the help pages for an audience, rendering them if anything changed
     """
 
     def __init__(self, bot: botcore.Bot):
@@ -26,9 +34,68 @@ class Help(commands.Cog):
         -------
         bot: botcore.Bot
             The Discord Bot that the Cog is loaded into
+
+        pages: dict
+            The rendered help pages for moderators and for everyone else
         """
 
         self.bot: botcore.Bot = bot
+        self.pages = dict()
+
+    def get_pages(self, moderator: bool) -> List[str]:
+        """Returns the help pages for an audience, rendering them if anything changed
+
+        Pages are cached per audience together with the bot's command generation
+        and the FAQ generation they were rendered from. Loading, unloading or
+        reloading a cog and adding or removing a FAQ command or alias change one
+        of those, so the next call renders the pages again.
+
+        Parameters
+        ----------
+        moderator: bool
+            Whether the pages should list the hidden commands
+        """
+
+        key = (self.bot.command_generation, windiautils.generation())
+        if (cached := self.pages.get(moderator)) and cached[0] == key:
+            return cached[1]
+
+        pages = list()
+        lines = ['```Here is our list of commands\n\nUtility Commands\n----------------\n']
+        length = len(lines[0])
+
+        def add(line: str):
+            nonlocal lines, length
+
+            # Check for a number below 2000 so the message doesn't go over 2000 characters
+            if length > 1900:
+                pages.append(''.join(lines))
+                lines, length = ['\n'], 1
+
+            lines.append(line)
+            length += len(line)
+
+        for command in self.bot.walk_commands():
+            if command.name == 'help':
+                continue
+
+            # Don't show users the hidden commands
+            if command.hidden and not moderator:
+                continue
+
+            add(f'{command.name} - {command.description}\n')
+
+        lines.append('\nFAQ Commands\n------------\n')
+        length += len(lines[-1])
+
+        for command in windiautils.command_names():
+            add(f'{command} | ')
+
+        lines.append('```')
+        pages.append(''.join(lines))
+
+        self.pages[moderator] = (key, pages)
+        return pages
 
     @commands.command(
         name='help',
@@ -42,9 +109,9 @@ class Help(commands.Cog):
         await help(ctx: discord.ext.commands.Context)
         
         This is a coroutine. This is not called directly; it is called whenever
-        a user uses the `$help` command. This will collect a list of all Bot commands
-        and FAQ commands and output a list of their names into the user's DM
-        channel.
+        a user uses the `$help` command. This will DM the user the cached list of
+        Bot commands and FAQ commands, including the hidden commands for users
+        with the manage messages permission.
         
         Parameters
         ----------
@@ -52,53 +119,22 @@ class Help(commands.Cog):
             The context of the command sent by the user
         """
 
-        messages = list()
-        help = '''```Here is our list of commands
-
-Utility Commands
-----------------
-'''
-
-        for command in self.bot.walk_commands():
-            if command.name == 'help':
-                continue
-
-            # Don't show users the hidden commands
-            if command.hidden:
-                if ctx.channel and not ctx.channel.permissions_for(ctx.author).manage_messages:
-                    continue
-
-            # Check for a number below 2000 so the message doesn't go over 2000 characters
-            if len(help) > 1900:
-                messages.append(help)
-                help = '\n'
-
-            help += f'{command.name} - {command.description}\n'
-
-        help += '''
-FAQ Commands
-------------
-'''
+        await windiautils.load_commands()
 
-        if await windiautils.database_exists():
-            async for command in windiautils.iter_commands():
-                if len(help) > 1900:
-                    messages.append(help)
-                    help = '\n'
-
-                help += f'{command} | '
-
-        help += '```'
-
-        messages.append(help)
-
-        for message in messages:
+        # the same answer the FAQ and Utility cogs gate their commands on
+        moderator = self.bot.access.resolve(ctx.channel, ctx.author).moderator
+        for message in self.get_pages(moderator):
             try:
-                await ctx.author.send(message)
+                await self.bot.outbox.send(ctx.author, botcore.PRIORITY_FAQ, content=message)
             except discord.Forbidden:
-                return await ctx.send('I could not DM you a list of commands since you are not accepting DMs from me.')
-
-        return await ctx.send('I have DMed you a list of commands.', delete_after=5.0)
+                return await self.bot.outbox.send(
+                    ctx, botcore.PRIORITY_FAQ,
+                    content='I could not DM you a list of commands since you are not accepting DMs from me.'
+                )
+
+        return await self.bot.outbox.send(
+            ctx, botcore.PRIORITY_FAQ, content='I have DMed you a list of commands.', delete_after=5.0
+        )
 
 
 def setup(bot):
@@ -1,5 +1,10 @@
 import re
 from datetime import datetime
+from typing import (
+    Collection,
+    Optional,
+    Tuple
+)
 
 import discord
 import discord.utils
@@ -21,6 +26,13 @@ class Utility(commands.Cog):
     -------
     async def get_id(ctx: discord.ext.commands.Context[, *, member: discord.Member = None])
         Tells a user their Discord ID
+
+    async def search_command(ctx: discord.ext.commands.Context, *, words: str)
+        Lists the FAQ commands whose name or description best match some words
+
+    async def send_embed(title: str, description: str, messageable: discord.abc.Messageable,
+                         author: discord.Member[, *, fields: Collection[Tuple[str, str]] = tuple()])
+        Sends an embed reply through the bot's outbox
     """
 
     def __init__(self, bot: botcore.Bot):
@@ -34,6 +46,30 @@ class Utility(commands.Cog):
 
         self.bot: botcore.Bot = bot
 
+    async def send_embed(
+            self,
+            title: str,
+            description: str,
+            messageable: discord.abc.Messageable,
+            author: discord.Member,
+            *,
+            fields: Collection[Tuple[str, str]] = tuple()
+    ) -> Optional[discord.Message]:
+        """Sends an embed reply through the bot's outbox
+
+        await send_embed(title: str, description: str, messageable: discord.abc.Messageable,
+                         author: discord.Member[, *, fields: Collection[Tuple[str, str]] = tuple()])
+
+        This is a coroutine. Takes the arguments of windiautils.send_embed, but
+        the reply is queued with the priority of a FAQ reply like every other
+        answer to a user.
+        """
+
+        template = windiautils.compile_embed(title, description, fields=fields)
+        return await self.bot.outbox.send(
+            messageable, botcore.PRIORITY_FAQ, embed=windiautils.render_template(template, author)
+        )
+
     @commands.command(
         name='id',
         description='Displays your Discord ID to link to Windia',
@@ -53,7 +89,7 @@ class Utility(commands.Cog):
         member = member or ctx.author
         messageable = ctx.channel or ctx.author
 
-        return await windiautils.send_embed(
+        return await self.send_embed(
             title=f'{member.display_name}\'s Discord ID: {member.id}',
             description=f'Type `@discord` in game and then enter this ID into the text box '
                         f'to link your in-game account to your Discord account.',
@@ -77,7 +113,9 @@ class Utility(commands.Cog):
         """
 
         if isinstance(ctx.guild, discord.DMChannel):
-            return await ctx.send('This command may only be used in the Windia Discord.')
+            return await self.bot.outbox.send(
+                ctx, botcore.PRIORITY_FAQ, content='This command may only be used in the Windia Discord.'
+            )
 
         message = 'I am currently unable to get the online count, sorry!'
 
@@ -89,7 +127,7 @@ class Utility(commands.Cog):
             else:
                 message = f'The server is currently **online** with {online_count} players.'
 
-        return await windiautils.send_embed(
+        return await self.send_embed(
             title=message,
             description='',
             messageable=ctx.channel,
@@ -115,7 +153,7 @@ class Utility(commands.Cog):
                 f'Example Usage: {self.bot.command_prefix}magic 43376970 570 -asle'
             )
 
-            return await windiautils.send_embed(
+            return await self.send_embed(
                 title='Magic Usage',
                 description=message,
                 messageable=ctx.channel or ctx.author,
@@ -153,7 +191,7 @@ class Utility(commands.Cog):
             magic = windiautils.calc_magic(monster_hp=hp, modifier=modifier)
             magic_msg += f'\nMagic: {magic}'
 
-        return await windiautils.send_embed(
+        return await self.send_embed(
             title='Magic Calculator',
             description=f'The Magic required to one-hit a monster with {hp} HP',
             messageable=ctx.channel or ctx.author,
@@ -169,17 +207,55 @@ class Utility(commands.Cog):
     )
     async def time_command(self, ctx):
         fmt_time = datetime.utcnow().strftime('%H:%M:%S, %d %b, %Y')
-        return await windiautils.send_embed(
+        return await self.send_embed(
             title=f'The server\'s current time is {fmt_time} UTC-0.',
             description='',
             messageable=ctx.channel or ctx.author,
             author=ctx.author
         )
 
+    @commands.command(
+        name='search',
+        description='Finds FAQ commands by what they are about',
+        usage='`words: string`'
+    )
+    async def search_command(self, ctx: commands.Context, *, words: str):
+        """Lists the FAQ commands whose name or description best match some words
+
+        await search_command(ctx: discord.ext.commands.Context, *, words: str)
+
+        This is a coroutine. This is not directly called; it is called whenever
+        a user uses the `$search` command. It is meant for users who know their
+        problem, like "missing dll", but not the name of the FAQ command about it.
+        """
+
+        if not await windiautils.search_available():
+            title = 'Search is unavailable'
+            description = (
+                'The SQLite library this bot runs on was built without full-text search (FTS5). '
+                f'Use `{self.bot.command_prefix}help` to list every FAQ command instead.'
+            )
+        elif results := await windiautils.search_commands(words):
+            title = f'FAQ commands matching {words}'
+            description = '\n\n'.join(
+                f'`{self.bot.command_prefix}{command}`\n{snippet}' for command, snippet in results
+            )
+        else:
+            title = f'No FAQ commands match {words}'
+            description = f'Try other words, or use `{self.bot.command_prefix}help` to list every FAQ command.'
+
+        return await self.send_embed(
+            title=title[:256],
+            description=description,
+            messageable=ctx.channel or ctx.author,
+            author=ctx.author
+        )
+
     def cog_check(self, ctx):
-        if ctx.guild and (bot_channel := ctx.guild.get_channel(708715939486498937)):
-            return ctx.channel.id == bot_channel.id or ctx.channel.permissions_for(ctx.author).manage_messages
-        return True
+        """Allows the utility commands in the bot channel, set by `Bot/Channel`, and anywhere for moderators"""
+
+        access = self.bot.access.resolve(ctx.channel, ctx.author)
+        return access.bot_channel or access.moderator
 
 
 def setup(bot):
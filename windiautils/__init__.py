@@ -1,4 +1,54 @@
-from .faqprocessor import *
-from .magiccalc import *
-from .config import *
-from .discordutils import *
+"""Utilities shared by the WindiaFAQ bot and its cogs
+
+Submodules are imported on first access of one of their names rather than when
+the package is imported, so a process or cog that never touches, say, the magic
+calculator never pays for importing it. `import_times` records how long each
+submodule took to import for the startup report.
+"""
+
+import importlib
+import time
+
+_exports = {
+    'cache': ('TTLCache', ),
+    'config': ('Config', 'COALESCE_WINDOW', 'METRICS_PORT'),
+    'database': ('Database', ),
+    'discordutils': ('send_embed', 'compile_embed', 'render_template', 'send_template', 'EmbedTemplate'),
+    'faqprocessor': ('iter_commands', 'create_database', 'database_exists', 'create_command', 'get_command',
+                     'update_command', 'delete_command', 'load_commands', 'cache_info', 'get_nearest_match',
+                     'command_names', 'generation', 'create_alias', 'resolve_command', 'import_commands',
+                     'export_commands', 'ImportResult', 'search_available', 'search_commands',
+                     'get_template'),
+    'faqfile': ('FAQ_FILE_FORMATS', 'FAQFileError', 'guess_format', 'read_entries', 'write_entries',
+                'describe_import'),
+    'fuzzy': ('TrigramIndex', 'is_similar'),
+    'keywords': ('KeywordIndex', 'KeywordMatch', 'keywords'),
+    'magiccalc': ('calc_magic', ),
+    'metrics': ('Metrics', 'Histogram'),
+    'usage': ('Usage', ),
+}
+_modules = {name: module for module, names in _exports.items() for name in names}
+
+__all__ = list(_modules)
+
+import_times = dict()
+
+
+def __getattr__(name: str):
+    if (module_name := _modules.get(name)) is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    qualified_name = f'{__name__}.{module_name}'
+    start = time.perf_counter()
+    module = importlib.import_module(qualified_name)
+    import_times.setdefault(qualified_name, time.perf_counter() - start)
+
+    # bind every name of the submodule so later accesses skip this function
+    for export in _exports[module_name]:
+        globals()[export] = getattr(module, export)
+
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,77 @@
+import collections
+import time
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    NoReturn
+)
+
+__all__ = ['TTLCache']
+
+
+class TTLCache:
+    """A bounded mapping whose entries expire after `ttl` seconds
+
+    Once `maxsize` entries are stored, setting a new key evicts the least
+    recently used one. Expired entries are dropped when they are next read.
+
+    Methods
+    -------
+    def get(key: Hashable[, default: Any = None]) -> Any
+        Returns the value at key if it is present and not expired
+
+    def set(key: Hashable, value: Any)
+        Stores a value at key, evicting the least recently used entry if full
+
+    def discard(key: Hashable)
+        Removes key if it is present
+
+    def discard_if(predicate: Callable[[Hashable], bool]) -> int
+        Removes every key the predicate returns True for
+    """
+    __slots__ = ['maxsize', 'ttl', '_data', '_timer']
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = collections.OrderedDict()
+        self._timer = timer
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, self) is not self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            expires, value = self._data[key]
+        except KeyError:
+            return default
+
+        if expires <= self._timer():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> NoReturn:
+        self._data[key] = (self._timer() + self.ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard(self, key: Hashable) -> NoReturn:
+        self._data.pop(key, None)
+
+    def discard_if(self, predicate: Callable[[Hashable], bool]) -> int:
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> NoReturn:
+        self._data.clear()
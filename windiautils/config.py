@@ -1,27 +1,64 @@
 import asyncio
+import collections
+import io
 import os
 import os.path
+import tempfile
 from typing import (
+    Dict,
     NoReturn,
     Any,
+    Optional,
+    Tuple,
     Union
 )
 
 import configobj
 
-__all__ = ['Config']
+__all__ = ['Config', 'COALESCE_WINDOW', 'METRICS_PORT']
 
 CONFIG_FILE = 'windia.ini'
+WATCH_INTERVAL = 2.0
+FLUSH_DELAY = 1.0
+# seconds within which a repeated FAQ reply in a channel is coalesced, also used when windia.ini lacks the key
+COALESCE_WINDOW = 30
+# the Prometheus endpoint is off unless a port is configured
+METRICS_PORT = 0
 DEFAULT_CONFIG = {
     'Bot': {
         'Prefix': '$',
         'Secrets': {
             'Token': None
         },
-        'Channel': 708715939486498937
+        'Channel': 708715939486498937,
+        'CoalesceWindow': COALESCE_WINDOW
     },
     'Logging': {
         'Channel': 714581563022770218
+    },
+    'Compute': {
+        'Workers': 2,
+        'MaxQueue': 16,
+        'Timeout': 10.0
+    },
+    'Outbox': {
+        'MaxQueue': 64,
+        'FAQStaleAfter': 60.0
+    },
+    'AutoAnswer': {
+        'Enabled': 0,
+        'Threshold': 0.4,
+        'Cooldown': 120.0,
+        'BudgetMicroseconds': 250
+    },
+    'Usage': {
+        'FlushInterval': 60.0
+    },
+    'Metrics': {
+        'Host': '127.0.0.1',
+        'Port': METRICS_PORT,
+        'LagInterval': 0.5,
+        'StallThreshold': 0.5
     }
 }
 
@@ -45,9 +82,87 @@ def write_config() -> NoReturn:
     config.write()
 
 
+# an immutable, flattened view of the configuration keyed on ('Section/Subsection', 'Key')
+Snapshot = collections.namedtuple('Snapshot', ['values', 'ints', 'mtime'])
+
+
+def flatten(section: configobj.Section, path: str = '') -> Dict[Tuple[str, str], Any]:
+    values = dict()
+    for key, value in section.items():
+        if isinstance(value, configobj.Section):
+            values.update(flatten(value, f'{path}/{key}' if path else key))
+        else:
+            values[path, key] = value
+    return values
+
+
+def write_atomic(filename: str, data: bytes) -> NoReturn:
+    """Replaces a file's contents without ever exposing a partially written file
+
+    The data is written and synced to a temporary file in the same directory,
+    which is then renamed over the target in a single step.
+    """
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    descriptor, temporary = tempfile.mkstemp(prefix=f'.{os.path.basename(filename)}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, filename)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def render(config: configobj.ConfigObj) -> bytes:
+    output = io.BytesIO()
+    config.write(outfile=output)
+    return output.getvalue()
+
+
+def get_mtime(filename: str) -> Optional[int]:
+    try:
+        return os.stat(filename).st_mtime_ns
+    except OSError:
+        return None
+
+
+def take_snapshot(config: configobj.ConfigObj, mtime: Optional[int] = None) -> Snapshot:
+    values = flatten(config)
+    ints = dict()
+    for key, value in values.items():
+        try:
+            ints[key] = int(value)
+        except (TypeError, ValueError):
+            pass
+    return Snapshot(values, ints, get_mtime(config.filename) if mtime is None else mtime)
+
+
+def parse(filename: str) -> Tuple[configobj.ConfigObj, Snapshot]:
+    """Reads and snapshots a configuration file; this blocks, so Config.watch runs it in an executor"""
+
+    # the modification time is taken first, so an edit made while parsing is picked up by the next poll
+    mtime = get_mtime(filename)
+    config = configobj.ConfigObj(filename)
+    return config, take_snapshot(config, mtime)
+
+
 class Config:
-    """A singleton class for the project's config settings"""
-    __slots__ = ['_config']
+    """A singleton class for the project's config settings
+
+    Reads are served synchronously from a flattened snapshot of the file. While
+    `watch` runs, edits to the file are picked up and swapped in as a whole new
+    snapshot, so a reader never sees a half-applied reload.
+
+    Writes are applied to the snapshot at once and written behind: every `set`
+    within FLUSH_DELAY seconds of the first unwritten one is saved by a single
+    atomic rewrite of the file, off the event loop."""
+    __slots__ = ['_config', '_snapshot', '_dirty', '_flush_handle', '_writing', 'writes']
 
     __instance = None
 
@@ -66,16 +181,125 @@ class Config:
             raise Exception('Cannot create multiple instances of a Singleton class')
 
         self._config = get_config()
+        self._snapshot = take_snapshot(self._config)
+        self._dirty = False
+        self._flush_handle = None
+        self._writing = None
+        self.writes = 0
         Config.__instance = self
 
+    def reload(self) -> bool:
+        """Rereads the configuration file if it changed since the last snapshot
+
+        Returns whether a new snapshot was swapped in. A file that fails to parse
+        leaves the current snapshot in place. This reads the file on the calling
+        thread, which must be the event loop's; `watch` reads it off the loop.
+        """
+
+        if self._dirty or self._writing or get_mtime(self._config.filename) == self._snapshot.mtime:
+            return False
+        return self._swap(self._snapshot, *parse(self._config.filename))
+
+    def _swap(self, previous: Snapshot, config: configobj.ConfigObj, snapshot: Snapshot) -> bool:
+        # runs on the event loop, so nothing can change between these checks and the swap
+        if self._dirty or self._writing or self._snapshot is not previous:
+            # unsaved changes, and changes made while the file was parsed, win over edits made to the file
+            return False
+
+        self._config, self._snapshot = config, snapshot
+        return True
+
+    async def watch(self, interval: float = WATCH_INTERVAL) -> NoReturn:
+        """Reloads the configuration whenever the file changes on disk
+
+        await watch([interval: float = WATCH_INTERVAL])
+
+        This is a coroutine that never returns; run it as a task. The file's
+        modification time is polled every `interval` seconds and only a changed
+        file is reread, off the event loop. The new snapshot is swapped in on the
+        loop and only if no `set` happened while the file was being read.
+        """
+
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(interval)
+            if self._dirty or self._writing or get_mtime(self._config.filename) == self._snapshot.mtime:
+                continue
+
+            previous = self._snapshot
+            try:
+                parsed = await loop.run_in_executor(None, parse, self._config.filename)
+            except configobj.ConfigObjError as error:
+                print(f'Could not reload {self._config.filename}: {error}')
+                continue
+
+            if self._swap(previous, *parsed):
+                print(f'Reloaded {self._config.filename}.')
+
     async def aioget(self, section: str, key: str, default: None = None) -> str:
-        return await asyncio.get_event_loop().run_in_executor(None, self.get, section, key, default)
+        return self.get(section, key, default)
 
     async def aiogetint(self, section: str, key: str, default: None = None) -> int:
-        return await asyncio.get_event_loop().run_in_executor(None, self.getint, section, key, default)
+        return self.getint(section, key, default)
 
     async def aioset(self, section: str, key: str, value: Any) -> NoReturn:
-        return await asyncio.get_event_loop().run_in_executor(None, self.getint, section, key, value)
+        return self.set(section, key, value)
+
+    async def flush(self) -> bool:
+        """Writes any unsaved changes to the configuration file
+
+        await flush()
+
+        This is a coroutine. It waits for a write already in progress, then
+        writes the current configuration if anything changed since. Returns
+        whether the file was written. The Bot calls this when shutting down.
+        """
+
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        while self._writing:
+            await asyncio.shield(self._writing)
+
+        if not self._dirty:
+            return False
+
+        data = render(self._config)
+        self._dirty = False
+        self._writing = asyncio.get_event_loop().run_in_executor(None, write_atomic, self._config.filename, data)
+        try:
+            await self._writing
+        except BaseException:
+            self._dirty = True
+            raise
+        finally:
+            self._writing = None
+
+        self.writes += 1
+        # the file now matches memory, so the watcher must not reread it
+        self._snapshot = self._snapshot._replace(mtime=get_mtime(self._config.filename))
+        return True
+
+    async def _scheduled_flush(self) -> NoReturn:
+        try:
+            await self.flush()
+        except Exception as error:
+            print(f'Could not write {self._config.filename}: {error}')
+
+    def _schedule_flush(self) -> NoReturn:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # no event loop to write behind on, so write now
+            write_atomic(self._config.filename, render(self._config))
+            self._dirty = False
+            self.writes += 1
+            self._snapshot = self._snapshot._replace(mtime=get_mtime(self._config.filename))
+            return
+
+        if not self._flush_handle:
+            self._flush_handle = loop.call_later(FLUSH_DELAY, lambda: loop.create_task(self._scheduled_flush()))
 
     def get(self, section: str, key: str, default: None = None) -> Union[str, None]:
         """Returns the value inside the section's key in the configuration
@@ -113,26 +337,21 @@ class Config:
         >>> value = config.get('Section/Subsection', 'Key')
         """
 
-        sections = section.split('/')
-        _section = self._config
-        for section in sections:
-            try:
-                _section = _section[section]
-            except KeyError:
-                return default
-        try:
-            return _section[key]
-        except KeyError:
-            return default
+        return self._snapshot.values.get((section, key), default)
 
     def getint(self, section: str, key: str, default: None = None) -> Union[None, int]:
-        return int(self.get(section, key, default))
+        try:
+            return self._snapshot.ints[section, key]
+        except KeyError:
+            return int(self.get(section, key, default))
 
     def set(self, section: str, key: str, value: Any) -> NoReturn:
         """Sets the value inside the section's key in the configuration
 
         Gets the lowest section given in the parameter `section` and sets the value
-        at the key parameter `key` to parameter `value`
+        at the key parameter `key` to parameter `value`. The new value can be read
+        back immediately; the file is written up to FLUSH_DELAY seconds later, or
+        straight away when no event loop is running.
 
         Parameters
         ----------
@@ -175,6 +394,9 @@ class Config:
                 raise KeyError(f'{section} does not exist in {self._config.filename}')
         try:
             _section[key] = value
-            self._config.write()
         except KeyError:
             raise KeyError(f'{key} does not exist in {section}')
+
+        self._snapshot = take_snapshot(self._config, self._snapshot.mtime)
+        self._dirty = True
+        self._schedule_flush()
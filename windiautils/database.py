@@ -0,0 +1,140 @@
+import asyncio
+import contextlib
+import os.path
+from typing import (
+    AsyncIterator,
+    NoReturn
+)
+
+import aiosqlite
+
+from .migrations import migrate
+
+__all__ = ['Database']
+
+DATABASE_FILE = 'windia.db'
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -8000),
+    ('temp_store', 'MEMORY'),
+    ('foreign_keys', 'ON'),
+)
+CACHED_STATEMENTS = 128
+
+
+class Database:
+    """A singleton class for the project's shared SQLite connection
+
+    The connection is opened once, configured with the pragmas in PRAGMAS and
+    reused by every query so statements stay in sqlite3's statement cache.
+    Writes go through `transaction` so that they cannot interleave."""
+    __slots__ = ['_connection', '_lock', '_connecting', 'filename']
+
+    __instance = None
+
+    @staticmethod
+    def getInstance():
+        """Static access method for Database singleton
+
+        Creates a new Database instance if one does not exist then returns
+        the Database instance"""
+        if not Database.__instance:
+            Database()
+        return Database.__instance
+
+    def __init__(self, filename: str = DATABASE_FILE):
+        if Database.__instance:
+            raise Exception('Cannot create multiple instances of a Singleton class')
+
+        self._connection = None
+        self._lock = None
+        self._connecting = None
+        self.filename = filename
+        Database.__instance = self
+
+    @property
+    def connected(self) -> bool:
+        return self._connection is not None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.filename)
+
+    async def connect(self) -> aiosqlite.Connection:
+        """Returns the shared connection, opening it on first use
+
+        await connect()
+
+        This is a coroutine. The first call opens the database file and applies
+        the connection pragmas and pending schema migrations, every later call
+        returns the same connection. Concurrent first calls wait for the one
+        that opens it, so the migrations never run twice.
+        """
+
+        if self._connection is not None:
+            return self._connection
+
+        # not the transaction lock, which is held while transaction() calls this
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+
+        async with self._connecting:
+            # a coroutine that waited for the lock finds the connection the first one opened
+            if self._connection is None:
+                connection = await aiosqlite.connect(self.filename, cached_statements=CACHED_STATEMENTS)
+                connection.row_factory = aiosqlite.Row
+                try:
+                    for pragma, value in PRAGMAS:
+                        await connection.execute(f" PRAGMA {pragma} = {value}; ")
+
+                    await migrate(connection)
+                except BaseException:
+                    await connection.close()
+                    raise
+                self._connection = connection
+
+        return self._connection
+
+    @contextlib.asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Yields the shared connection for writes that are committed together
+
+        async with transaction() as db:
+
+        Every coroutine shares one connection, so without the lock taken here
+        one writer's commit could commit another writer's unfinished statements.
+        The writes are committed when the block exits and rolled back if it
+        raises.
+        """
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            connection = await self.connect()
+            try:
+                yield connection
+            except BaseException:
+                await connection.rollback()
+                raise
+            await connection.commit()
+
+    async def close(self) -> NoReturn:
+        """Commits any pending work and closes the shared connection
+
+        await close()
+
+        This is a coroutine. It is called by the Bot when it shuts down; the
+        next call to connect will open a new connection. A transaction still
+        running, such as a shielded usage write whose caller was cancelled, is
+        waited for rather than closed underneath.
+        """
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if connection := self._connection:
+                self._connection = None
+                await connection.commit()
+                await connection.close()
@@ -1,32 +1,81 @@
+import copy
 import discord
 import re
 
 from typing import (
+    NamedTuple,
+    Optional,
     Tuple,
     Collection
 )
 
-__all__ = ['send_embed']
+__all__ = ['send_embed', 'compile_embed', 'render_template', 'send_template', 'EmbedTemplate']
 
+DEFAULT_FOOTER = 'Send FAQ suggestions to your nearest staff member and everything else to wallace05#0828 :)'
 
-async def send_embed(
+# the first image url anywhere in a description, ending at whitespace, a closing bracket or the end; a query string
+# after the extension, as on resized Discord CDN links, is kept
+IMAGE_URL = re.compile(
+    r'https?://[^\s<>]+?\.(?:jpe?g|png|gif)(?:\?[^\s<>]*?)?(?=$|[\s<>)\]]|[.,!?](?:\s|$))', re.IGNORECASE
+)
+
+
+class EmbedTemplate(NamedTuple):
+    """A rendered embed that only needs its author set before it is sent
+
+    Build one with compile_embed and send it with send_template. `embed` is
+    shared by every send and must not be modified.
+    """
+
+    title: str
+    description: str
+    image: Optional[str]
+    fields: Tuple[Tuple[str, str], ...]
+    footer: str
+    embed: discord.Embed
+
+
+def compile_embed(
         title: str,
         description: str,
-        messageable: discord.abc.Messageable,
-        author: discord.Member,
         *,
-        footer: str = 'Send FAQ suggestions to your nearest staff member and everything else to wallace05#0828 :)',
+        footer: str = DEFAULT_FOOTER,
         fields: Collection[Tuple[str, str]] = tuple()
-):
+) -> EmbedTemplate:
     embed = discord.Embed(title=title, description=description, color=discord.Color.purple())
-    embed.set_author(name=f'{author}', icon_url=author.avatar_url)
     embed.set_footer(text=footer)
 
     # embed any first image url found in the description
-    if match := re.match(r'(https[^\s]+\.(jpe?g|png))', description):
-        embed.set_image(url=match.group(0))
+    image = match.group(0) if (match := IMAGE_URL.search(description)) else None
+    if image:
+        embed.set_image(url=image)
 
+    fields = tuple((name, value) for name, value in fields)
     for name, value in fields:
         embed.add_field(name=name, value=value)
 
-    return await messageable.send(embed=embed)
+    return EmbedTemplate(title, description, image, fields, footer, embed)
+
+
+def render_template(template: EmbedTemplate, author: discord.Member) -> discord.Embed:
+    # a shallow copy is enough since set_author replaces the author rather than changing it
+    embed = copy.copy(template.embed)
+    embed.set_author(name=f'{author}', icon_url=author.avatar_url)
+    return embed
+
+
+async def send_template(template: EmbedTemplate, messageable: discord.abc.Messageable, author: discord.Member):
+    return await messageable.send(embed=render_template(template, author))
+
+
+async def send_embed(
+        title: str,
+        description: str,
+        messageable: discord.abc.Messageable,
+        author: discord.Member,
+        *,
+        footer: str = DEFAULT_FOOTER,
+        fields: Collection[Tuple[str, str]] = tuple()
+):
+    template = compile_embed(title, description, footer=footer, fields=fields)
+    return await send_template(template, messageable, author)
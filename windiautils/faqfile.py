@@ -0,0 +1,211 @@
+"""Reads and writes FAQ commands as JSON or CSV files
+
+JSON files hold one object mapping each FAQ command to its description, like
+commands.json, or a list of objects with `command` and `description` keys.
+CSV files have a `command,description` header row. Every entry is validated
+before any of them is imported.
+
+While the bot is not running, a file can be imported into or exported from
+windia.db with
+
+    python -m windiautils.faqfile import commands.json [--replace] [--dry-run]
+    python -m windiautils.faqfile export commands.csv
+
+While it is running, use the $import and $export commands instead so the
+bot's resident FAQ cache stays in sync.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os.path
+import sys
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    NoReturn,
+    Optional,
+    TextIO,
+    Tuple
+)
+
+from .database import Database
+from .faqprocessor import ImportResult, export_commands, import_commands
+
+__all__ = ['FAQ_FILE_FORMATS', 'FAQFileError', 'guess_format', 'read_entries', 'write_entries', 'describe_import']
+
+FAQ_FILE_FORMATS = ('json', 'csv')
+CSV_FIELDS = ('command', 'description')
+# the longest description an embed can hold
+MAX_DESCRIPTION_LENGTH = 2048
+MAX_REPORTED_ERRORS = 10
+MAX_REPORTED_NAMES = 20
+
+Entry = Tuple[str, object, object]
+
+
+class FAQFileError(ValueError):
+    """Raised when a FAQ file cannot be parsed or holds invalid entries
+
+    Members
+    -------
+    errors: List[str]
+        Every problem found, each naming the entry it was found in
+    """
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        message = '; '.join(errors[:MAX_REPORTED_ERRORS])
+        if len(errors) > MAX_REPORTED_ERRORS:
+            message += f' and {len(errors) - MAX_REPORTED_ERRORS} more'
+        super().__init__(message)
+
+
+def guess_format(filename: str, default: str = 'json') -> str:
+    """Returns the FAQ file format named by a file's extension, or `default` if it names none"""
+
+    extension = os.path.splitext(filename)[1].lower().lstrip('.')
+    return extension if extension in FAQ_FILE_FORMATS else default
+
+
+def _iter_json(stream: TextIO) -> Iterator[Entry]:
+    try:
+        data = json.load(stream)
+    except json.JSONDecodeError as error:
+        raise FAQFileError([f'invalid JSON: {error}'])
+
+    if isinstance(data, dict):
+        for command, description in data.items():
+            yield f'entry {command!r}', command, description
+    elif isinstance(data, list):
+        for index, item in enumerate(data, start=1):
+            if not isinstance(item, dict):
+                raise FAQFileError([f'entry {index} is not an object'])
+            yield f'entry {index}', item.get('command'), item.get('description')
+    else:
+        raise FAQFileError(['the file must hold an object or a list of objects'])
+
+
+def _iter_csv(stream: TextIO) -> Iterator[Entry]:
+    reader = csv.DictReader(stream)
+    try:
+        if reader.fieldnames is None or not set(CSV_FIELDS) <= set(reader.fieldnames):
+            raise FAQFileError([f'the header row must name the columns {",".join(CSV_FIELDS)}'])
+        for row in reader:
+            yield f'line {reader.line_num}', row.get('command'), row.get('description')
+    except csv.Error as error:
+        raise FAQFileError([f'invalid CSV on line {reader.line_num}: {error}'])
+
+
+def read_entries(stream: TextIO, file_format: str = 'json') -> Dict[str, str]:
+    """Reads and validates the FAQ commands of a file
+
+    read_entries(stream: TextIO[, file_format: str = 'json'])
+
+    Command names are lowercased the way $add lowercases them. CSV streams
+    should be opened with newline='' so descriptions may span lines.
+
+    Raises
+    ------
+    FAQFileError
+        The file could not be parsed, held no entries or held invalid ones
+    """
+
+    if file_format not in FAQ_FILE_FORMATS:
+        raise FAQFileError([f'unknown format {file_format}, use one of {", ".join(FAQ_FILE_FORMATS)}'])
+
+    entries = dict()
+    errors = list()
+    for where, command, description in (_iter_json if file_format == 'json' else _iter_csv)(stream):
+        if not isinstance(command, str) or not command.strip():
+            errors.append(f'{where} has no command')
+            continue
+        if len(command.split()) != 1:
+            errors.append(f'{where} has a command with whitespace in it')
+            continue
+        if not isinstance(description, str) or not description.strip():
+            errors.append(f'{where} has no description')
+            continue
+        if len(description) > MAX_DESCRIPTION_LENGTH:
+            errors.append(f'{where} has a description over {MAX_DESCRIPTION_LENGTH} characters')
+            continue
+
+        command = command.strip().lower()
+        if command in entries:
+            errors.append(f'{where} repeats the command {command}')
+            continue
+        entries[command] = description
+
+    if not entries and not errors:
+        errors.append('the file holds no entries')
+    if errors:
+        raise FAQFileError(errors)
+    return entries
+
+
+def write_entries(entries: Dict[str, str], stream: TextIO, file_format: str = 'json') -> NoReturn:
+    """Writes FAQ commands in a format read_entries reads back
+
+    write_entries(entries: Dict[str, str], stream: TextIO[, file_format: str = 'json'])
+
+    JSON is written in the layout of commands.json. CSV streams should be
+    opened with newline=''.
+    """
+
+    if file_format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(CSV_FIELDS)
+        writer.writerows(entries.items())
+    else:
+        json.dump(entries, stream, indent=2, ensure_ascii=False)
+        stream.write('\n')
+
+
+def describe_import(result: ImportResult, dry_run: bool = False) -> str:
+    """Summarizes the result of import_commands in a sentence or two"""
+
+    counts = ', '.join(f'{len(names)} {field}' for field, names in zip(result._fields, result))
+    summary = f'{"Dry run, nothing was changed" if dry_run else "Imported"}: {counts}.'
+    if result.skipped:
+        names = ', '.join(result.skipped[:MAX_REPORTED_NAMES])
+        if len(result.skipped) > MAX_REPORTED_NAMES:
+            names += ', ...'
+        summary += f' Skipped because they are aliases: {names}.'
+    return summary
+
+
+async def main(action: str, path: str, file_format: Optional[str], replace: bool, dry_run: bool,
+               database: str) -> NoReturn:
+    Database(database)
+    file_format = file_format or guess_format(path)
+    try:
+        if action == 'import':
+            with open(path, encoding='utf-8-sig', newline='') as file:
+                entries = read_entries(file, file_format)
+            print(describe_import(await import_commands(entries, replace=replace, dry_run=dry_run), dry_run))
+        else:
+            entries = await export_commands()
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                write_entries(entries, file, file_format)
+            print(f'Exported {len(entries)} commands to {path}.')
+    finally:
+        await Database.getInstance().close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('action', choices=('import', 'export'))
+    parser.add_argument('path', help='the JSON or CSV file to read or write')
+    parser.add_argument('-f', '--format', choices=FAQ_FILE_FORMATS, help='defaults to the file extension')
+    parser.add_argument('--replace', action='store_true', help='remove commands missing from the file')
+    parser.add_argument('--dry-run', action='store_true', help='only report what an import would change')
+    parser.add_argument('--database', default='windia.db')
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(main(arguments.action, arguments.path, arguments.format, arguments.replace, arguments.dry_run,
+                         arguments.database))
+    except (FAQFileError, OSError) as error:
+        print(f'{arguments.path}: {error}')
+        sys.exit(1)
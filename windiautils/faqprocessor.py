@@ -1,95 +1,437 @@
-import difflib
-import aiosqlite
+import collections
+import re
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple
+)
 
-import os.path
+from .cache import TTLCache
+from .database import Database
+from .discordutils import EmbedTemplate, compile_embed
+from .fuzzy import TrigramIndex, is_similar
+from .metrics import Metrics
 
-__all__ = ['iter_commands', 'create_database', 'database_exists', 'create_command', 'get_command', 'update_command', 'delete_command']
+__all__ = ['iter_commands', 'create_database', 'database_exists', 'create_command', 'get_command', 'update_command', 'delete_command',
+           'load_commands', 'cache_info', 'get_nearest_match', 'command_names', 'generation', 'create_alias',
+           'resolve_command', 'import_commands', 'export_commands', 'ImportResult',
+           'search_available', 'search_commands', 'get_template']
 
+# the names of the entries an import adds, changes, leaves alone, removes and skips because they are aliases
+ImportResult = collections.namedtuple('ImportResult', ['added', 'updated', 'unchanged', 'removed', 'skipped'])
+CacheInfo = collections.namedtuple('CacheInfo', ['hits', 'misses', 'size', 'loaded', 'negative_hits', 'negative_size'])
 
-async def is_nearest_match(command, faq_command):
-    return any((command in faq_command, faq_command in command,
-                difflib.SequenceMatcher(None, command, faq_command).ratio() > min(0.8, 1.0 - 1 / len(command))))
+NEAREST_MATCH_LIMIT = 5
+NEGATIVE_CACHE_SIZE = 2048
+NEGATIVE_CACHE_TTL = 600.0
+SEARCH_LIMIT = 5
+SEARCH_MAX_TERMS = 8
+SEARCH_SNIPPET_TOKENS = 16
+# the weight of a match in a command's name against one in its description
+SEARCH_NAME_WEIGHT = 10.0
+SEARCH_TERM = re.compile(r'\w+')
 
 
-async def get_nearest_match(connection: aiosqlite.Connection, command: str):
-    nearest_matches = []
-
+def get_nearest_match(command: str, limit: int = NEAREST_MATCH_LIMIT):
     if len(command) > 2:
         # produces too many matches with only 2 characters in a command so ignore this
-        async with connection.execute(" SELECT * FROM commands; ") as cursor:
-            async for row in cursor:
-                if await is_nearest_match(command, row['command']):
-                    nearest_matches.append(row['command'])
+        with Metrics.getInstance().time('fuzzy_match_seconds'):
+            return __fuzzy_index.search(command, limit)
+
+    return []
+
+
+def forget_misses(command: str):
+    """Drops the cached misses a new FAQ name would now answer or be suggested for"""
+
+    return __negative_cache.discard_if(
+        lambda token: token == command or (len(token) > 2 and is_similar(token, command))
+    )
+
+def render_templates(names: Iterable[str]):
+    """Renders the embeds of FAQ names whose description changed since they were last rendered"""
+
+    for name in names:
+        description = __faq_cache[__alias_cache.get(name, name)]
+        if (template := __template_cache.get(name)) is None or template.description != description:
+            __template_cache[name] = compile_embed(title=name, description=description)
+
+
+def get_template(command: str) -> Optional[EmbedTemplate]:
+    """Returns the rendered embed of a FAQ name, or None if it is not one
+
+    Embeds are rendered when a FAQ command or alias is written, or loaded, so
+    answering only stamps the author on the embed.
+    """
+
+    return __template_cache.get(command)
+
+# resident copy of the commands and aliases tables, filled once by load_commands and
+# kept in sync by the create/update/delete functions so lookups never touch the database
+__faq_cache = {}
+__alias_cache = {}
+__fuzzy_index = TrigramIndex()
+# the rendered embed of every FAQ name, aliases included since they are the embed's title
+__template_cache: Dict[str, EmbedTemplate] = {}
+__cache_state = {'hits': 0, 'misses': 0, 'negative_hits': 0, 'loaded': False, 'generation': 0}
+
+# the connection search_available last looked at, and whether it has the full-text index; only a migration, run
+# when a connection is opened, creates the index
+__search_state = {'connection': None, 'available': False}
+
+# tokens known not to be FAQ names, mapped to their "Did you mean" reply (or None)
+__negative_cache = TTLCache(maxsize=NEGATIVE_CACHE_SIZE, ttl=NEGATIVE_CACHE_TTL)
+
+
+async def load_commands(reload: bool = False):
+    """Loads the commands and aliases tables into the resident FAQ cache
+
+    await load_commands([reload: bool = False])
+
+    This is a coroutine. The cache is only filled on the first call unless
+    `reload` is set, every later lookup is served from memory.
+    """
+
+    if __cache_state['loaded'] and not reload:
+        return
+
+    commands = {}
+    aliases = {}
+    if await database_exists():
+        db = await Database.getInstance().connect()
+        with Metrics.getInstance().time('faq_query_seconds', query='load'):
+            # fetchall costs one round trip to the connection's thread where iterating costs one per row
+            async with db.execute(" SELECT command, description FROM commands ORDER BY id; ") as cursor:
+                commands.update(await cursor.fetchall())
+            async with db.execute(" SELECT alias, command FROM aliases; ") as cursor:
+                aliases.update(await cursor.fetchall())
+
+    __faq_cache.clear()
+    __faq_cache.update(commands)
+    __alias_cache.clear()
+    __alias_cache.update(aliases)
+    __fuzzy_index.clear()
+    for command in (*commands, *aliases):
+        __fuzzy_index.add(command)
+    # names whose description did not change keep the embed already rendered for them
+    for name in [name for name in __template_cache if name not in commands and name not in aliases]:
+        del __template_cache[name]
+    render_templates((*commands, *aliases))
+    __negative_cache.clear()
+    __cache_state['loaded'] = True
+    __cache_state['generation'] += 1
+
+
+def command_names():
+    """Returns the FAQ command names and aliases in the resident cache"""
 
-    return nearest_matches
+    return [*__faq_cache, *__alias_cache]
 
-__commands_file = 'windia.db'
+
+def resolve_command(command: str):
+    """Returns the command a FAQ name or alias refers to, or None if it is neither"""
+
+    command = __alias_cache.get(command, command)
+    return command if command in __faq_cache else None
+
+
+def generation():
+    """Returns a counter that changes whenever a FAQ command is added, removed or updated
+
+    Callers deriving data from the FAQ names or descriptions can compare it
+    against the value they built from instead of being notified.
+    """
+
+    return __cache_state['generation']
+
+
+def cache_info():
+    """Returns the hit and miss counts of the resident FAQ cache and the negative cache"""
+
+    return CacheInfo(__cache_state['hits'], __cache_state['misses'], len(__faq_cache), __cache_state['loaded'],
+                     __cache_state['negative_hits'], len(__negative_cache))
 
 
 async def create_database():
-    async with aiosqlite.connect(__commands_file) as db:
-        await db.execute(" DROP TABLE IF EXISTS commands; ")
-        await db.execute(" CREATE TABLE commands(command, description); ")
-        await db.commit()
+    with Metrics.getInstance().time('faq_query_seconds', query='clear'):
+        async with Database.getInstance().transaction() as db:
+            await db.execute(" DELETE FROM aliases; ")
+            await db.execute(" DELETE FROM commands; ")
+
+    __faq_cache.clear()
+    __alias_cache.clear()
+    __fuzzy_index.clear()
+    __template_cache.clear()
+    __negative_cache.clear()
+    __cache_state['loaded'] = True
+    __cache_state['generation'] += 1
 
 
 async def database_exists():
-    return os.path.exists(__commands_file)
+    return Database.getInstance().exists()
 
 
 async def create_command(command: str, value: str):
-    async with aiosqlite.connect(__commands_file) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute(" SELECT * FROM commands WHERE command = ?; ", (command, )) as cursor:
-            if await cursor.fetchone():
-                return False
-            else:
-                await db.execute(" INSERT INTO commands (command, description) VALUES (?, ?); ", (command, value, ))
-                await db.commit()
-                return True
+    await load_commands()
+
+    with Metrics.getInstance().time('faq_query_seconds', query='create'):
+        async with Database.getInstance().transaction() as db:
+            cursor = await db.execute(
+                " INSERT INTO commands (command, description) SELECT ?, ? "
+                " WHERE NOT EXISTS (SELECT 1 FROM aliases WHERE alias = ?) ON CONFLICT (command) DO NOTHING; ",
+                (command, value, command, )
+            )
+
+    if cursor.rowcount > 0:
+        __faq_cache[command] = value
+        render_templates((command, ))
+        __fuzzy_index.add(command)
+        forget_misses(command)
+        __cache_state['generation'] += 1
+    return cursor.rowcount
+
+
+async def create_alias(alias: str, command: str):
+    """Adds another name for an existing FAQ command
+
+    await create_alias(alias: str, command: str)
+
+    This is a coroutine. Aliasing an alias points the new alias at the command
+    behind it. Returns the number of rows added, which is 0 if the command does
+    not exist or the alias is already a command or an alias.
+    """
+
+    await load_commands()
+    command = __alias_cache.get(command, command)
+
+    with Metrics.getInstance().time('faq_query_seconds', query='alias'):
+        async with Database.getInstance().transaction() as db:
+            cursor = await db.execute(
+                " INSERT INTO aliases (alias, command) SELECT ?, command FROM commands "
+                " WHERE command = ? AND NOT EXISTS (SELECT 1 FROM commands WHERE command = ?) "
+                " ON CONFLICT (alias) DO NOTHING; ",
+                (alias, command, alias, )
+            )
+
+    if cursor.rowcount > 0:
+        __alias_cache[alias] = command
+        render_templates((alias, ))
+        __fuzzy_index.add(alias)
+        forget_misses(alias)
+        __cache_state['generation'] += 1
+    return cursor.rowcount
 
 
 async def get_command(command: str):
-    async with aiosqlite.connect(__commands_file) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute(" SELECT * FROM commands WHERE command = ?; ", (command, )) as cursor:
-            if row := await cursor.fetchone():
-                return row['description']
-            else:
-                nearest_matches = await get_nearest_match(db, command)
-                if nearest_matches:
-                    return f'Did you mean... {",".join(nearest_matches)}?'
-                else:
-                    return None
+    await load_commands()
+
+    if (description := __faq_cache.get(__alias_cache.get(command, command))) is not None:
+        __cache_state['hits'] += 1
+        return description
+
+    __cache_state['misses'] += 1
+    token = command.strip().lower()
+    if (reply := __negative_cache.get(token, __negative_cache)) is not __negative_cache:
+        __cache_state['negative_hits'] += 1
+        return reply
+
+    nearest_matches = get_nearest_match(token)
+    if nearest_matches:
+        reply = f'Did you mean... {",".join(nearest_matches)}?'
+    else:
+        reply = None
+
+    __negative_cache.set(token, reply)
+    return reply
 
 
 async def update_command(command: str, value: str):
-    async with aiosqlite.connect(__commands_file) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute(" SELECT * FROM commands WHERE command = ?; ", (command, )) as cursor:
-            if await cursor.fetchone():
-                await db.execute(" UPDATE commands SET description = ? WHERE command = ?; ", (value, command, ))
-                await db.commit()
-                return True
-            else:
-                return False
+    await load_commands()
+    command = __alias_cache.get(command, command)
+
+    with Metrics.getInstance().time('faq_query_seconds', query='update'):
+        async with Database.getInstance().transaction() as db:
+            cursor = await db.execute(" UPDATE commands SET description = ? WHERE command = ?; ", (value, command, ))
+
+    if cursor.rowcount > 0:
+        __faq_cache[command] = value
+        render_templates((command, *(alias for alias, target in __alias_cache.items() if target == command)))
+        __cache_state['generation'] += 1
+    return cursor.rowcount
 
 
 async def delete_command(command: str):
-    async with aiosqlite.connect(__commands_file) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute(" SELECT * FROM commands WHERE command = ?; ", (command,)) as cursor:
-            if await cursor.fetchone():
-                await db.execute(" DELETE FROM commands WHERE command = ?; ", (command,))
-                await db.commit()
-                return True
+    """Removes a FAQ command with all of its aliases, or only the alias if given one
+
+    await delete_command(command: str)
+
+    This is a coroutine. Returns the number of commands or aliases removed.
+    """
+
+    await load_commands()
+
+    with Metrics.getInstance().time('faq_query_seconds', query='delete'):
+        async with Database.getInstance().transaction() as db:
+            if command in __alias_cache:
+                cursor = await db.execute(" DELETE FROM aliases WHERE alias = ?; ", (command, ))
+                removed = [command]
             else:
-                return False
+                # the aliases go with the command through ON DELETE CASCADE
+                cursor = await db.execute(" DELETE FROM commands WHERE command = ?; ", (command, ))
+                removed = [command, *(alias for alias, target in __alias_cache.items() if target == command)]
+
+    if cursor.rowcount > 0:
+        __faq_cache.pop(command, None)
+        for name in removed:
+            __alias_cache.pop(name, None)
+            __template_cache.pop(name, None)
+            __fuzzy_index.remove(name)
+            # cached suggestions may still name the removed command
+            forget_misses(name)
+        __cache_state['generation'] += 1
+    return cursor.rowcount
 
 
 async def iter_commands():
-    async with aiosqlite.connect(__commands_file) as db:
-        db.row_factory = aiosqlite.Row
-        async with db.execute(" SELECT * FROM commands; ") as cursor:
-            async for row in cursor:
-                yield row['command']
+    await load_commands()
+    for command in command_names():
+        yield command
+
+
+def plan_import(entries: Dict[str, str], replace: bool) -> ImportResult:
+    """Sorts the entries of an import by what applying them would do to the resident cache"""
+
+    added, updated, unchanged, skipped = [], [], [], []
+    for command, description in entries.items():
+        if command in __alias_cache:
+            skipped.append(command)
+        elif command not in __faq_cache:
+            added.append(command)
+        elif __faq_cache[command] != description:
+            updated.append(command)
+        else:
+            unchanged.append(command)
+
+    removed = [command for command in __faq_cache if command not in entries] if replace else []
+    return ImportResult(added, updated, unchanged, removed, skipped)
+
+
+async def import_commands(entries: Dict[str, str], replace: bool = False, dry_run: bool = False) -> ImportResult:
+    """Adds and updates many FAQ commands at once in a single transaction
+
+    await import_commands(entries: Dict[str, str][, replace: bool = False, dry_run: bool = False])
+
+    This is a coroutine. Entries are applied with one executemany per kind of
+    change, so importing thousands of entries costs about as much as a single
+    `create_command`. Entries named like an existing alias are skipped. With
+    `replace` set, every command missing from the entries is removed together
+    with its aliases. With `dry_run` set nothing is written and the result
+    describes what the import would do. The resident cache is reloaded once
+    the transaction has been committed.
+
+    Parameters
+    ----------
+    entries: Dict[str, str]
+        The lowercased FAQ command names mapped to their descriptions
+
+    replace: bool = False
+        Whether commands missing from the entries are removed
+
+    dry_run: bool = False
+        Whether to only report what the import would change
+    """
+
+    await load_commands()
+    if dry_run:
+        return plan_import(entries, replace)
+
+    with Metrics.getInstance().time('faq_query_seconds', query='import'):
+        async with Database.getInstance().transaction() as db:
+            # planned under the lock, so no other write can land between the plan and the statements
+            result = plan_import(entries, replace)
+            if result.removed:
+                await db.executemany(
+                    " DELETE FROM commands WHERE command = ?; ", ((command, ) for command in result.removed)
+                )
+            if result.added or result.updated:
+                await db.executemany(
+                    " INSERT INTO commands (command, description) VALUES (?, ?) "
+                    " ON CONFLICT (command) DO UPDATE SET description = excluded.description; ",
+                    ((command, entries[command]) for command in (*result.added, *result.updated))
+                )
+
+    if result.added or result.updated or result.removed:
+        await load_commands(reload=True)
+    return result
+
+
+async def export_commands() -> Dict[str, str]:
+    """Returns every FAQ command mapped to its description, oldest first
+
+    await export_commands()
+
+    This is a coroutine. Aliases are not included.
+    """
+
+    await load_commands()
+    return dict(__faq_cache)
+
+
+def search_query(text: str) -> str:
+    """Turns the words of a search into an FTS5 query matching any of them
+
+    Every word is quoted, so FTS5 operators and column filters typed by users
+    are searched for rather than interpreted.
+    """
+
+    return ' OR '.join(f'"{term}"' for term in SEARCH_TERM.findall(text.lower())[:SEARCH_MAX_TERMS])
+
+
+async def search_available() -> bool:
+    """Returns whether the database has the full-text index search_commands uses
+
+    await search_available()
+
+    This is a coroutine. The index needs SQLite built with FTS5; without it the
+    migration creating it is skipped. Before the database file exists this
+    returns True, since it is created with the index when FTS5 is there.
+    """
+
+    if not await database_exists():
+        return True
+
+    db = await Database.getInstance().connect()
+    if __search_state['connection'] is not db:
+        async with db.execute(
+            " SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'commands_fts'; "
+        ) as cursor:
+            __search_state['available'] = await cursor.fetchone() is not None
+        __search_state['connection'] = db
+    return __search_state['available']
+
+
+async def search_commands(text: str, limit: int = SEARCH_LIMIT) -> List[Tuple[str, str]]:
+    """Searches the names and descriptions of the FAQ commands for the words of a text
+
+    await search_commands(text: str[, limit: int = SEARCH_LIMIT])
+
+    This is a coroutine. Returns up to `limit` pairs of a command and a snippet
+    of its description with the matched words in bold, best match first as
+    ranked by BM25. Words are stemmed, so "crashing" finds "crash". Matches in
+    a command's name count for more than matches in its description. Nothing
+    is found when search_available is False.
+    """
+
+    if not (query := search_query(text)) or not await database_exists() or not await search_available():
+        return []
+
+    db = await Database.getInstance().connect()
+    with Metrics.getInstance().time('faq_query_seconds', query='search'):
+        async with db.execute(
+            " SELECT command, snippet(commands_fts, 1, '**', '**', '...', ?) AS snippet FROM commands_fts "
+            " WHERE commands_fts MATCH ? ORDER BY bm25(commands_fts, ?, 1.0) LIMIT ?; ",
+            (SEARCH_SNIPPET_TOKENS, query, SEARCH_NAME_WEIGHT, limit, )
+        ) as cursor:
+            return [(row['command'], row['snippet']) for row in await cursor.fetchall()]
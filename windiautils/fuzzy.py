@@ -0,0 +1,133 @@
+import collections
+import difflib
+import heapq
+from typing import (
+    FrozenSet,
+    Iterable,
+    List,
+    NoReturn
+)
+
+__all__ = ['TrigramIndex', 'is_similar']
+
+# how many of the best trigram candidates are verified with difflib per requested suggestion
+CANDIDATE_FACTOR = 8
+
+
+def trigrams(word: str) -> FrozenSet[str]:
+    """Returns the set of trigrams of a word padded with a space on each side
+
+    The padding gives words shorter than three characters trigrams of their
+    own and weights the first and last letters, which is where typos the least
+    often land.
+    """
+
+    padded = f' {word} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(word: str, other: str) -> float:
+    return difflib.SequenceMatcher(None, word, other).ratio()
+
+
+def is_similar(word: str, other: str) -> bool:
+    """Returns whether two words are close enough to suggest one for the other
+
+    Either word containing the other counts, as does a difflib ratio above
+    0.8, relaxed to 1 - 1/len(word) for short words.
+    """
+
+    return any((word in other, other in word,
+                similarity(word, other) > min(0.8, 1.0 - 1 / len(word))))
+
+
+class TrigramIndex:
+    """An inverted index from trigrams to words for "Did you mean" suggestions
+
+    Only words sharing a trigram with the query are considered, and only the
+    ones sharing the most are compared with difflib, so the cost of a search
+    depends on how many words look like the query rather than on the size of
+    the index.
+
+    Methods
+    -------
+    def add(word: str)
+        Adds a word to the index
+
+    def remove(word: str)
+        Removes a word from the index
+
+    def search(query: str[, limit: int = 5]) -> List[str]
+        Returns up to `limit` similar words, most similar first
+    """
+    __slots__ = ['_postings', '_words']
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._postings = collections.defaultdict(set)
+        self._words = dict()
+
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def add(self, word: str) -> NoReturn:
+        if word in self._words:
+            return
+
+        grams = trigrams(word)
+        self._words[word] = grams
+        for gram in grams:
+            self._postings[gram].add(word)
+
+    def remove(self, word: str) -> NoReturn:
+        if (grams := self._words.pop(word, None)) is None:
+            return
+
+        for gram in grams:
+            posting = self._postings[gram]
+            posting.discard(word)
+            if not posting:
+                del self._postings[gram]
+
+    def clear(self) -> NoReturn:
+        self._postings.clear()
+        self._words.clear()
+
+    def candidates(self, query: str, limit: int) -> List[str]:
+        """Returns the `limit` words sharing the most trigrams with the query"""
+
+        shared = collections.Counter()
+        for gram in trigrams(query):
+            if posting := self._postings.get(gram):
+                shared.update(posting)
+
+        return [word for word, _ in heapq.nlargest(limit, shared.items(), key=lambda item: item[1])]
+
+    def search(self, query: str, limit: int = 5) -> List[str]:
+        """Returns up to `limit` words similar to the query, most similar first
+
+        Parameters
+        ----------
+        query: str
+            The word to find suggestions for
+
+        limit: int = 5
+            The maximum number of suggestions to return
+
+        Returns
+        -------
+        List[str]
+            The suggestions ordered by descending difflib ratio
+        """
+
+        scored = []
+        for word in self.candidates(query, limit * CANDIDATE_FACTOR):
+            if word != query and is_similar(query, word):
+                scored.append((similarity(query, word), word))
+
+        return [word for _, word in heapq.nlargest(limit, scored)]
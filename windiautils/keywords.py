@@ -0,0 +1,167 @@
+import collections
+import math
+import re
+import time
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple
+)
+
+__all__ = ['KeywordIndex', 'KeywordMatch', 'keywords']
+
+WORD = re.compile(r'[a-z0-9]+')
+# words carrying no hint of what a question is about
+STOPWORDS = frozenset('''
+    a about am an and any anyone are as at be been but by can could did do does doing for from get got had has have
+    help hey hi how i if im in is it its just know me my need no not of on or please pls should so some someone
+    that the then there this to u up us was way we what when where which who why will with would you your
+'''.split())
+# a name is what a FAQ is about, so its words count as much as this many words of description
+NAME_WEIGHT = 3
+# terms in more than this share of the FAQs tell them apart too little to be worth scanning
+MAX_DOCUMENT_FREQUENCY = 0.5
+# only the FAQs a term weighs the most in are kept in its postings
+MAX_POSTINGS = 128
+MAX_MESSAGE_LENGTH = 400
+MAX_TERMS = 24
+
+
+class KeywordMatch(NamedTuple):
+    """The FAQ command a message is most likely about and the cosine similarity between them"""
+
+    command: str
+    score: float
+
+
+def stem(word: str) -> str:
+    """Strips the common English suffixes so "crashes", "crashed" and "crashing" share a term"""
+
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('ches', 'shes', 'sses', 'xes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    if len(word) > 5 and word.endswith('ing'):
+        return word[:-3]
+    if len(word) > 4 and word.endswith('ed'):
+        return word[:-2]
+    return word
+
+
+def keywords(text: str) -> List[str]:
+    """Returns the stemmed words of a text without its stopwords"""
+
+    return [stem(word) for word in WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+class KeywordIndex:
+    """A TF-IDF inverted index matching chat messages to FAQ commands
+
+    Every FAQ is a vector of its terms weighted by (1 + log tf) * idf and
+    scaled to unit length, and every term maps to the FAQs containing it with
+    their weight. A message is weighted the same way, so its score against a
+    FAQ is their cosine similarity; words no FAQ contains still count towards
+    the message's length, so chat that merely mentions a FAQ's word scores low.
+
+    Only the postings of the message's own terms are visited, rarest first,
+    and scoring stops as soon as no FAQ can reach the threshold any more, which
+    is where most chat ends. Postings keep only the MAX_POSTINGS FAQs a term
+    weighs the most in, so a FAQ in which a very common term is minor does not
+    score for it; this bounds the work per term however large the FAQ grows.
+
+    Members
+    -------
+    size: int
+        The number of FAQ commands in the index
+
+    Methods
+    -------
+    def match(text: str[, threshold: float = 0.0, budget_ns: int = None]) -> Optional[KeywordMatch]
+        Returns the FAQ command a text is most likely about
+    """
+    __slots__ = ['size', '_postings', '_bounds', '_idf', '_unknown_idf']
+
+    def __init__(self, documents: Mapping[str, Tuple[Iterable[str], str]]):
+        """Builds the index
+
+        Parameters
+        ----------
+        documents: Mapping[str, Tuple[Iterable[str], str]]
+            Each FAQ command mapped to its names, aliases included, and its description
+        """
+
+        counts = dict()
+        for command, (names, description) in documents.items():
+            terms = collections.Counter(keywords(description))
+            for name in names:
+                for term in keywords(name.replace('_', ' ')):
+                    terms[term] += NAME_WEIGHT
+            counts[command] = terms
+
+        self.size = len(counts)
+        frequencies = collections.Counter(term for terms in counts.values() for term in terms)
+        self._idf = {
+            term: math.log((self.size + 1) / (frequency + 0.5))
+            for term, frequency in frequencies.items() if frequency <= max(1.0, self.size * MAX_DOCUMENT_FREQUENCY)
+        }
+        self._unknown_idf = math.log(self.size + 2)
+
+        postings = collections.defaultdict(list)
+        for command, terms in counts.items():
+            weights = {
+                term: (1 + math.log(count)) * self._idf[term] for term, count in terms.items() if term in self._idf
+            }
+            if not (norm := math.sqrt(sum(weight * weight for weight in weights.values()))):
+                continue
+            for term, weight in weights.items():
+                postings[term].append((command, weight / norm))
+
+        self._postings: Dict[str, List[Tuple[str, float]]] = {
+            term: sorted(entries, key=lambda entry: -entry[1])[:MAX_POSTINGS] for term, entries in postings.items()
+        }
+        # the most any FAQ can gain from a term, per unit of query weight
+        self._bounds = {term: entries[0][1] for term, entries in self._postings.items()}
+
+    def match(self, text: str, threshold: float = 0.0, budget_ns: Optional[int] = None) -> Optional[KeywordMatch]:
+        """Returns the FAQ command a text is most likely about
+
+        Returns None when no FAQ scores at least `threshold` or when scoring the
+        text would take longer than `budget_ns` nanoseconds; the budget is checked
+        after every posting list, and no list is longer than MAX_POSTINGS.
+        """
+
+        deadline = time.perf_counter_ns() + budget_ns if budget_ns is not None else None
+        terms = collections.Counter(keywords(text[:MAX_MESSAGE_LENGTH])[:MAX_TERMS])
+        if not terms:
+            return None
+
+        query = {term: (1 + math.log(count)) * self._idf.get(term, self._unknown_idf) for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in query.values()))
+
+        terms = sorted((term for term in query if term in self._postings), key=lambda term: -self._idf[term])
+        weights = [query[term] / norm for term in terms]
+        remaining = sum(weight * self._bounds[term] for term, weight in zip(terms, weights))
+
+        scores = collections.defaultdict(float)
+        best, best_score = None, 0.0
+        for term, weight in zip(terms, weights):
+            if best_score + remaining < threshold or not remaining:
+                # not even the best FAQ so far can reach the threshold with every term left
+                break
+            remaining -= weight * self._bounds[term]
+            for command, document_weight in self._postings[term]:
+                score = scores[command] = scores[command] + weight * document_weight
+                if score > best_score:
+                    best, best_score = command, score
+            if deadline is not None and time.perf_counter_ns() > deadline:
+                return None
+
+        if best is None or best_score < threshold:
+            return None
+        return KeywordMatch(best, best_score)
@@ -1,17 +1,62 @@
-from sympy import Symbol
-from sympy.solvers import solve
-
+import functools
 import math
 
 __all__ = ['calc_magic']
 
+MASTERY = 0.6
+
+# calc_magic solves a * x**2 + b * x = monster_hp / modifier for the magic x, where
+# ((x ** 2 / 1000 + x * mastery * 0.9) / 30 + x / 200) * modifier is the damage dealt
+QUADRATIC = 1.0 / 1000.0 / 30.0
+LINEAR = MASTERY * 0.9 / 30.0 + 1.0 / 200.0
+
+
+def calc_damage(magic: int, modifier: float = 1.0) -> float:
+    return (((magic ** 2) / 1000.0 + magic * MASTERY * 0.9) / 30.0 + magic / 200.0) * modifier
+
+
+@functools.lru_cache(maxsize=1024)
+def calc_magic(monster_hp: int, modifier: float = 1.0) -> int:
+    """Returns the least magic needed to one-hit a monster
+
+    The damage formula is a quadratic in magic, so its non-negative root is
+    computed in closed form and rounded up. The root is taken as
+    2c / (b + sqrt(b^2 + 4ac)) rather than (-b + sqrt(b^2 + 4ac)) / 2a, which
+    loses precision to cancellation for monsters with little HP. When the exact
+    answer is an integer the float root can land a hair to either side of it,
+    so the rounded result is checked against the damage formula itself.
+
+    Parameters
+    ----------
+    monster_hp: int
+        The HP of the monster
+
+    modifier: float = 1.0
+        The spell attack times every multiplier that applies
+
+    Returns
+    -------
+    int
+        The magic needed, rounded up
+
+    Raises
+    ------
+    ValueError
+        No non-negative amount of magic deals enough damage
+    """
+
+    if modifier <= 0:
+        raise ValueError(f'No magic one-hits a monster with a modifier of {modifier}')
 
-def calc_magic(monster_hp: int, modifier: float = 1.0):
-    x = Symbol('x')
-    mastery = 0.6
+    target = monster_hp / modifier
+    discriminant = LINEAR ** 2 + 4.0 * QUADRATIC * target
+    if target < 0 or discriminant < 0:
+        raise ValueError(f'No magic one-hits a monster with {monster_hp} HP')
 
-    solution = solve(((((x ** 2) / 1000.0 + x * mastery * 0.9) / 30.0 + x / 200.0) * modifier) / monster_hp - 1.0,
-                     x)
+    magic = math.ceil(2.0 * target / (LINEAR + math.sqrt(discriminant)))
+    if magic > 0 and calc_damage(magic - 1, modifier) >= monster_hp:
+        magic -= 1
+    elif calc_damage(magic, modifier) < monster_hp:
+        magic += 1
 
-    magic = min([math.ceil(num) for num in solution if num >= 0.0])
     return magic
@@ -0,0 +1,223 @@
+import bisect
+import contextlib
+import math
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NoReturn,
+    Tuple
+)
+
+__all__ = ['Metrics', 'Histogram']
+
+PREFIX = 'windiafaq_'
+
+# seconds, from a cached FAQ lookup up to a slow calculation
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                   5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels: Labels, extra: str = '') -> str:
+    parts = [f'{key}="{escape(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Histogram:
+    """Counts observations into fixed buckets, the way Prometheus histograms do
+
+    Methods
+    -------
+    def observe(value: float)
+        Adds an observation
+
+    def quantile(q: float) -> float
+        Estimates the q-quantile by interpolating inside its bucket
+    """
+    __slots__ = ['bounds', 'counts', 'count', 'sum']
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> NoReturn:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return math.nan
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.bounds[index - 1] if index else 0.0
+                if index == len(self.bounds):
+                    # the overflow bucket has no upper bound to interpolate towards
+                    return lower
+                return lower + (self.bounds[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class Metrics:
+    """Process-wide counters, gauges and latency histograms
+
+    Every series is named by a metric name and a set of labels. Gauges that
+    mirror state kept elsewhere are refreshed by collectors right before they
+    are read, so nothing has to push them on the hot path.
+
+    Methods
+    -------
+    def increment(name: str[, amount: float = 1, **labels])
+        Adds to a counter
+
+    def set_gauge(name: str, value: float, **labels)
+        Sets a gauge
+
+    def observe(name: str, seconds: float, **labels)
+        Adds an observation to a histogram
+
+    def time(name: str, **labels) -> ContextManager
+        Observes how long the body of a with statement took
+
+    def describe(name: str, description: str)
+        Sets the help text rendered for a metric
+
+    def add_collector(collector: Callable[[Metrics], None])
+        Registers a function that refreshes gauges before they are read
+
+    def remove_collector(collector: Callable[[Metrics], None])
+        Unregisters a collector
+
+    def collect()
+        Runs every collector
+
+    def histograms(name: str) -> Dict[Labels, Histogram]
+        Returns every histogram series of a metric
+
+    def counters(name: str) -> Dict[Labels, float]
+        Returns every counter series of a metric
+
+    def gauges(name: str) -> Dict[Labels, float]
+        Returns every gauge series of a metric, as of the last collect
+
+    def render() -> str
+        Returns every series in the Prometheus text exposition format
+    """
+    __instance = None
+    __slots__ = ['started', '_counters', '_gauges', '_histograms', '_collectors', '_descriptions']
+
+    @staticmethod
+    def getInstance():
+        """Static access method for Metrics singleton
+
+        Creates a new Metrics instance if one does not exist then returns
+        the Metrics instance"""
+        if not Metrics.__instance:
+            Metrics()
+        return Metrics.__instance
+
+    def __init__(self):
+        if Metrics.__instance:
+            raise Exception('Cannot create multiple instances of a Singleton class')
+
+        self.started = time.time()
+        self._counters: Dict[str, Dict[Labels, float]] = dict()
+        self._gauges: Dict[str, Dict[Labels, float]] = dict()
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = dict()
+        self._collectors: List[Callable[['Metrics'], None]] = list()
+        self._descriptions: Dict[str, str] = dict()
+        Metrics.__instance = self
+
+    def describe(self, name: str, description: str) -> NoReturn:
+        self._descriptions[name] = description
+
+    def increment(self, name: str, amount: float = 1, **labels) -> NoReturn:
+        series = self._counters.setdefault(name, dict())
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels) -> NoReturn:
+        self._gauges.setdefault(name, dict())[tuple(sorted(labels.items()))] = value
+
+    def observe(self, name: str, seconds: float, **labels) -> NoReturn:
+        series = self._histograms.setdefault(name, dict())
+        key = tuple(sorted(labels.items()))
+        if (histogram := series.get(key)) is None:
+            histogram = series[key] = Histogram()
+        histogram.observe(seconds)
+
+    @contextlib.contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, collector: Callable[['Metrics'], None]) -> NoReturn:
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[['Metrics'], None]) -> NoReturn:
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def collect(self) -> NoReturn:
+        for collector in self._collectors:
+            collector(self)
+
+    def histograms(self, name: str) -> Dict[Labels, Histogram]:
+        return self._histograms.get(name, dict())
+
+    def counters(self, name: str) -> Dict[Labels, float]:
+        return self._counters.get(name, dict())
+
+    def gauges(self, name: str) -> Dict[Labels, float]:
+        return self._gauges.get(name, dict())
+
+    def render(self) -> str:
+        self.collect()
+        lines = list()
+
+        def header(name: str, kind: str):
+            if description := self._descriptions.get(name):
+                lines.append(f'# HELP {PREFIX}{name} {description}')
+            lines.append(f'# TYPE {PREFIX}{name} {kind}')
+
+        for name, series in sorted(self._counters.items()):
+            header(name, 'counter')
+            for labels, value in series.items():
+                lines.append(f'{PREFIX}{name}{format_labels(labels)} {value}')
+
+        for name, series in sorted(self._gauges.items()):
+            header(name, 'gauge')
+            for labels, value in series.items():
+                lines.append(f'{PREFIX}{name}{format_labels(labels)} {value}')
+
+        for name, series in sorted(self._histograms.items()):
+            header(name, 'histogram')
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip((*histogram.bounds, '+Inf'), histogram.counts):
+                    cumulative += count
+                    bucket = f'le="{bound}"'
+                    lines.append(f'{PREFIX}{name}_bucket{format_labels(labels, bucket)} {cumulative}')
+                lines.append(f'{PREFIX}{name}_sum{format_labels(labels)} {histogram.sum}')
+                lines.append(f'{PREFIX}{name}_count{format_labels(labels)} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,133 @@
+import sqlite3
+from typing import NoReturn
+
+import aiosqlite
+
+__all__ = ['SCHEMA_VERSION', 'migrate']
+
+# Each entry upgrades the database by one version; the entry at index n takes a
+# database from `PRAGMA user_version` n to n + 1. Never edit a shipped entry,
+# append a new one instead.
+MIGRATIONS = (
+    # 1: give commands a primary key and a unique index on command. Older files
+    # may hold duplicate names, only the first row of each name is kept.
+    """
+    CREATE TABLE IF NOT EXISTS commands(command, description);
+    CREATE TABLE commands_v1(
+        id INTEGER PRIMARY KEY,
+        command TEXT NOT NULL UNIQUE,
+        description TEXT NOT NULL
+    );
+    INSERT OR IGNORE INTO commands_v1 (command, description)
+        SELECT command, COALESCE(description, '') FROM commands WHERE command IS NOT NULL ORDER BY rowid;
+    DROP TABLE commands;
+    ALTER TABLE commands_v1 RENAME TO commands;
+    """,
+    # 2: store aliases as names pointing at their command instead of copies of its
+    # row, and collapse commands with identical descriptions into aliases of the
+    # oldest one
+    """
+    CREATE TABLE aliases(
+        alias TEXT PRIMARY KEY,
+        command TEXT NOT NULL REFERENCES commands (command) ON DELETE CASCADE ON UPDATE CASCADE
+    ) WITHOUT ROWID;
+    CREATE INDEX aliases_command ON aliases (command);
+    INSERT INTO aliases (alias, command)
+        SELECT duplicate.command, canonical.command
+        FROM commands AS duplicate
+        JOIN commands AS canonical ON canonical.id = (
+            SELECT MIN(id) FROM commands WHERE description = duplicate.description
+        )
+        WHERE duplicate.id != canonical.id;
+    DELETE FROM commands WHERE command IN (SELECT alias FROM aliases);
+    """,
+    # 3: full-text index over the commands, stored as an external content table so
+    # the text is not kept twice. The triggers update it row by row from then on;
+    # the rebuild only fills it once for the rows that already exist.
+    """
+    CREATE VIRTUAL TABLE commands_fts USING fts5(
+        command, description, content='commands', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER commands_fts_insert AFTER INSERT ON commands BEGIN
+        INSERT INTO commands_fts (rowid, command, description) VALUES (new.id, new.command, new.description);
+    END;
+    CREATE TRIGGER commands_fts_delete AFTER DELETE ON commands BEGIN
+        INSERT INTO commands_fts (commands_fts, rowid, command, description)
+            VALUES ('delete', old.id, old.command, old.description);
+    END;
+    CREATE TRIGGER commands_fts_update AFTER UPDATE ON commands BEGIN
+        INSERT INTO commands_fts (commands_fts, rowid, command, description)
+            VALUES ('delete', old.id, old.command, old.description);
+        INSERT INTO commands_fts (rowid, command, description) VALUES (new.id, new.command, new.description);
+    END;
+    INSERT INTO commands_fts (commands_fts) VALUES ('rebuild');
+    """,
+    # 4: FAQ usage counted per command, channel and hour since the epoch. Rows are
+    # keyed by name rather than id so the history of a removed command is kept.
+    """
+    CREATE TABLE faq_usage(
+        command TEXT NOT NULL,
+        channel INTEGER NOT NULL,
+        hour INTEGER NOT NULL,
+        uses INTEGER NOT NULL,
+        PRIMARY KEY (command, channel, hour)
+    ) WITHOUT ROWID;
+    CREATE INDEX faq_usage_hour ON faq_usage (hour);
+    """,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Migrations that need an optional SQLite module, by the version they upgrade
+# to. Without the module they only bump `user_version`, so the migrations after
+# them still run; what they would have created is missing.
+REQUIRED_MODULES = {
+    3: 'fts5',
+}
+
+
+async def get_version(connection: aiosqlite.Connection) -> int:
+    async with connection.execute(" PRAGMA user_version; ") as cursor:
+        return (await cursor.fetchone())[0]
+
+
+async def module_available(connection: aiosqlite.Connection, module: str) -> bool:
+    # the compile options cannot tell, since they may be left out of the build and a module may be loaded as an
+    # extension, so a throwaway table is created with it
+    try:
+        await connection.execute(f" CREATE VIRTUAL TABLE temp.module_probe USING {module}(text); ")
+    except sqlite3.OperationalError:
+        return False
+    await connection.execute(" DROP TABLE temp.module_probe; ")
+    return True
+
+
+async def migrate(connection: aiosqlite.Connection) -> NoReturn:
+    """Upgrades the database in place to SCHEMA_VERSION
+
+    await migrate(connection: aiosqlite.Connection)
+
+    This is a coroutine. Every pending migration runs in its own transaction
+    together with the `user_version` bump, so a failed migration leaves the
+    file at the last good version. A migration in REQUIRED_MODULES is skipped
+    when SQLite lacks its module.
+
+    Raises
+    ------
+    RuntimeError
+        The database was written by a newer version of the bot
+    """
+
+    version = await get_version(connection)
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(f'Database schema version {version} is newer than {SCHEMA_VERSION}')
+
+    for target, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        if (module := REQUIRED_MODULES.get(target)) and not await module_available(connection, module):
+            print(f'Skipping database migration {target}: SQLite was built without {module}')
+            script = ''
+        try:
+            await connection.executescript(f'BEGIN; {script} PRAGMA user_version = {target}; COMMIT;')
+        except Exception:
+            await connection.rollback()
+            raise
@@ -0,0 +1,156 @@
+import asyncio
+import collections
+import time
+from typing import (
+    List,
+    NoReturn,
+    Tuple
+)
+
+from .database import Database
+from .metrics import Metrics
+
+__all__ = ['Usage']
+
+FLUSH_INTERVAL = 60.0
+TOP_LIMIT = 10
+
+UsageReport = collections.namedtuple('UsageReport', ['total', 'commands', 'channels'])
+
+
+class Usage:
+    """A singleton class counting how often each FAQ command is used
+
+    Uses are counted in memory per FAQ command, channel and hour, and written
+    to the faq_usage table by `flush`, which adds every pending count with a
+    single executemany in one transaction. The pending counts are swapped out
+    before they are written and only put back if the write is rolled back, so
+    a count is written exactly once; a crash loses at most the counts since
+    the last flush and never writes one twice.
+
+    Members
+    -------
+    pending: int
+        The number of counters waiting to be flushed
+
+    Methods
+    -------
+    def record(command: str, channel_id: int)
+        Counts one use of a FAQ command
+
+    async def flush() -> int
+        Writes the pending counts to the database
+
+    async def run(interval: float = FLUSH_INTERVAL)
+        Flushes every `interval` seconds until cancelled
+
+    async def top(days: float[, limit: int = TOP_LIMIT]) -> UsageReport
+        Returns the most used FAQ commands and channels of the last days
+    """
+    __instance = None
+    __slots__ = ['_counts']
+
+    @staticmethod
+    def getInstance():
+        """Static access method for Usage singleton
+
+        Creates a new Usage instance if one does not exist then returns
+        the Usage instance"""
+        if not Usage.__instance:
+            Usage()
+        return Usage.__instance
+
+    def __init__(self):
+        if Usage.__instance:
+            raise Exception('Cannot create multiple instances of a Singleton class')
+
+        self._counts = collections.Counter()
+        Usage.__instance = self
+
+    @property
+    def pending(self) -> int:
+        return len(self._counts)
+
+    def record(self, command: str, channel_id: int) -> NoReturn:
+        """Counts one use of a FAQ command; this never touches the database"""
+
+        self._counts[command, channel_id, int(time.time() // 3600)] += 1
+
+    async def flush(self) -> int:
+        """Writes the pending counts to the database
+
+        await flush()
+
+        This is a coroutine. Returns the number of counters written.
+        """
+
+        if not self._counts:
+            return 0
+
+        counts, self._counts = self._counts, collections.Counter()
+        try:
+            # shielded so that cancelling a flush mid-commit cannot leave it unknown whether the counts were written
+            await asyncio.shield(self._write(counts))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # the transaction was rolled back, so these are retried by the next flush
+            self._counts.update(counts)
+            raise
+        return len(counts)
+
+    async def _write(self, counts: collections.Counter) -> NoReturn:
+        with Metrics.getInstance().time('faq_query_seconds', query='usage'):
+            async with Database.getInstance().transaction() as db:
+                await db.executemany(
+                    " INSERT INTO faq_usage (command, channel, hour, uses) VALUES (?, ?, ?, ?) "
+                    " ON CONFLICT (command, channel, hour) DO UPDATE SET uses = uses + excluded.uses; ",
+                    ((command, channel, hour, uses) for (command, channel, hour), uses in counts.items())
+                )
+
+    async def run(self, interval: float = FLUSH_INTERVAL) -> NoReturn:
+        """Flushes every `interval` seconds until cancelled
+
+        await run([interval: float = FLUSH_INTERVAL])
+
+        This is a coroutine that never returns; run it as a task. A failed flush
+        is reported and its counts are kept for the next one.
+        """
+
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception as error:
+                print(f'Could not flush FAQ usage: {error!r}')
+
+    async def top(self, days: float, limit: int = TOP_LIMIT) -> UsageReport:
+        """Returns the most used FAQ commands and channels of the last days
+
+        await top(days: float[, limit: int = TOP_LIMIT])
+
+        This is a coroutine. Pending counts are flushed first so they are
+        included. The report holds the total number of uses and lists of
+        (command, uses) and (channel id, uses) pairs, most used first; uses in
+        direct messages have the channel id 0.
+        """
+
+        await self.flush()
+        since = int((time.time() - days * 24 * 60 * 60) // 3600)
+
+        db = await Database.getInstance().connect()
+        with Metrics.getInstance().time('faq_query_seconds', query='top'):
+            async with db.execute(
+                " SELECT command, SUM(uses) AS uses FROM faq_usage WHERE hour >= ? "
+                " GROUP BY command ORDER BY uses DESC, command LIMIT ?; ", (since, limit, )
+            ) as cursor:
+                commands: List[Tuple[str, int]] = [tuple(row) for row in await cursor.fetchall()]
+            async with db.execute(
+                " SELECT channel, SUM(uses) AS uses FROM faq_usage WHERE hour >= ? "
+                " GROUP BY channel ORDER BY uses DESC LIMIT ?; ", (since, limit, )
+            ) as cursor:
+                channels: List[Tuple[int, int]] = [tuple(row) for row in await cursor.fetchall()]
+            async with db.execute(" SELECT TOTAL(uses) FROM faq_usage WHERE hour >= ?; ", (since, )) as cursor:
+                total = int((await cursor.fetchone())[0])
+
+        return UsageReport(total, commands, channels)